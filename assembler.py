@@ -10,14 +10,76 @@ class VMAssembler:
     
     # Коды операций
     OP_READ_MEM = 0    # Чтение из памяти
+    OP_JUMP = 1        # Безусловный переход
+    OP_JUMP_IF_ZERO = 2  # Переход, если вершина стека равна нулю
     OP_BINARY_OP = 3   # Бинарная операция
+    OP_MEMCPY = 4      # Копирование блока памяти
     OP_WRITE_MEM = 5   # Запись в память  
+    OP_MEMSET = 6      # Заполнение блока памяти
     OP_LOAD_CONST = 7  # Загрузка константы
     
+    # Размер инструкций в байтах
+    INSTRUCTION_SIZES = {
+        "LOAD_CONST": 5,
+        "READ_MEM": 1,
+        "WRITE_MEM": 3,
+        "BINARY_OP": 3,
+        "JUMP": 3,
+        "JUMP_IF_ZERO": 3,
+        "MEMCPY": 1,
+        "MEMSET": 1,
+    }
+    
+    JUMP_OPS = ("JUMP", "JUMP_IF_ZERO")
+    BLOCK_OPS = ("MEMCPY", "MEMSET")
+    
     def __init__(self):
         self.labels = {}
         self.program = []
         
+    def resolve_labels(self, instructions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Первый проход: сбор меток и раскладка программы.
+        
+        Элемент {"label": "имя"} без поля op отмечает позицию следующей
+        инструкции (или конец программы), поле "label" у инструкции
+        отмечает саму инструкцию. Возвращает список инструкций без
+        чистых меток и байтовые смещения инструкций (последний элемент -
+        размер программы). Индексы меток сохраняются в self.labels
+        """
+        self.labels = {}
+        program = []
+        offsets = [0]
+        
+        for instr in instructions:
+            label = instr.get("label")
+            if label is not None:
+                if label in self.labels:
+                    raise ValueError(f"Повторное определение метки: {label}")
+                self.labels[label] = len(program)
+            if "op" not in instr:
+                continue
+            op = instr["op"].upper()
+            if op not in self.INSTRUCTION_SIZES:
+                raise ValueError(f"Неизвестная операция: {op}")
+            program.append(instr)
+            offsets.append(offsets[-1] + self.INSTRUCTION_SIZES[op])
+            
+        return program, offsets
+    
+    def resolve_target(self, instr: Dict[str, Any], program_length: int) -> int:
+        """
+        Индекс инструкции, на которую указывает переход (метка или номер)
+        """
+        target = instr["target"]
+        if isinstance(target, str):
+            if target not in self.labels:
+                raise ValueError(f"Неизвестная метка: {target}")
+            target = self.labels[target]
+        if not 0 <= target <= program_length:
+            raise ValueError(f"Адрес перехода вне программы: {target}")
+        return target
+        
     def parse_instruction(self, instr: Dict[str, Any]) -> List[int]:
         """
         Парсинг одной инструкции в байт-код
@@ -69,11 +131,52 @@ class VMAssembler:
             
             bytes_result = [byte1, byte2, byte3]
             
+        elif op in self.BLOCK_OPS:
+            # Блочная операция: 1 байт, операнды берутся из стека
+            opcode = self.OP_MEMCPY if op == "MEMCPY" else self.OP_MEMSET
+            bytes_result = [(opcode & 0x7) << 5]
+            
+        elif op in self.JUMP_OPS:
+            # Переход: 3 байта, байтовое смещение цели кодируется без потерь
+            opcode = self.OP_JUMP if op == "JUMP" else self.OP_JUMP_IF_ZERO
+            a_byte = (opcode & 0x7) << 5
+            b_value = instr["target"] & 0x1FFFFF  # 21 бит
+            
+            byte1 = a_byte | ((b_value >> 16) & 0x1F)
+            byte2 = (b_value >> 8) & 0xFF
+            byte3 = b_value & 0xFF
+            
+            bytes_result = [byte1, byte2, byte3]
+            
         else:
             raise ValueError(f"Неизвестная операция: {op}")
             
         return bytes_result
     
+    def encode_instructions(self, instructions: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[int]]]:
+        """
+        Общий путь ассемблирования: разрешение меток и кодирование.
+        Возвращает пары (инструкция с переходом в байтах, ее байты)
+        """
+        instructions, offsets = self.resolve_labels(instructions)
+        encoded = []
+        
+        for instr in instructions:
+            if instr["op"].upper() in self.JUMP_OPS:
+                # Номер инструкции заменяется байтовым смещением
+                target = self.resolve_target(instr, len(instructions))
+                instr = dict(instr, target=offsets[target])
+            encoded.append((instr, self.parse_instruction(instr)))
+            
+        return encoded
+    
+    def encode_program(self, instructions: List[Dict[str, Any]]) -> bytes:
+        """
+        Ассемблирование списка инструкций в байты без работы с файлами
+        """
+        return bytes(byte for _, bytes_result in self.encode_instructions(instructions)
+                     for byte in bytes_result)
+    
     def assemble_to_binary(self, source_file: str, output_file: str, test_mode: bool = False):
         """
         Ассемблирование в бинарный формат
@@ -81,16 +184,14 @@ class VMAssembler:
         with open(source_file, 'r', encoding='utf-8') as f:
             program_data = json.load(f)
         
-        instructions = program_data.get("instructions", [])
         binary_output = []
         internal_representation = []
         
-        for i, instr in enumerate(instructions):
-            bytes_result = self.parse_instruction(instr)
+        for instr, bytes_result in self.encode_instructions(program_data.get("instructions", [])):
+            op = instr["op"].upper()
             binary_output.extend(bytes_result)
             
             if test_mode:
-                op = instr.get("op", "")
                 if op == "LOAD_CONST":
                     internal_representation.append({
                         'instruction': f'LOAD_CONST {instr["value"]}',
@@ -119,6 +220,20 @@ class VMAssembler:
                         'A': self.OP_BINARY_OP,
                         'B': instr["address"]
                     })
+                elif op in self.BLOCK_OPS:
+                    internal_representation.append({
+                        'instruction': op,
+                        'bytes': bytes_result,
+                        'A': self.OP_MEMCPY if op == "MEMCPY" else self.OP_MEMSET,
+                        'B': None
+                    })
+                elif op in self.JUMP_OPS:
+                    internal_representation.append({
+                        'instruction': f'{op} {instr["target"]}',
+                        'bytes': bytes_result,
+                        'A': self.OP_JUMP if op == "JUMP" else self.OP_JUMP_IF_ZERO,
+                        'B': instr["target"]
+                    })
         
         with open(output_file, 'wb') as f:
             f.write(bytes(binary_output))
@@ -138,14 +253,11 @@ class VMAssembler:
         
         return binary_output, internal_representation
 
-    def assemble_to_intermediate(self, source_file: str, output_file: str):
+    def build_intermediate(self, instructions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Ассемблирование в промежуточное представление для интерпретатора
+        Построение промежуточного представления из списка инструкций
         """
-        with open(source_file, 'r', encoding='utf-8') as f:
-            program_data = json.load(f)
-        
-        instructions = program_data.get("instructions", [])
+        instructions, _ = self.resolve_labels(instructions)
         intermediate_repr = []
         
         for i, instr in enumerate(instructions):
@@ -156,10 +268,23 @@ class VMAssembler:
                 intermediate_instr["value"] = instr["value"]
             elif op in ["WRITE_MEM", "BINARY_OP"]:
                 intermediate_instr["address"] = instr["address"]
-            elif op == "READ_MEM":
+            elif op in self.JUMP_OPS:
+                intermediate_instr["target"] = self.resolve_target(instr, len(instructions))
+            elif op in ["READ_MEM", "MEMCPY", "MEMSET"]:
                 pass  # Нет дополнительных параметров
                 
             intermediate_repr.append(intermediate_instr)
+            
+        return intermediate_repr
+
+    def assemble_to_intermediate(self, source_file: str, output_file: str):
+        """
+        Ассемблирование в промежуточное представление для интерпретатора
+        """
+        with open(source_file, 'r', encoding='utf-8') as f:
+            program_data = json.load(f)
+        
+        intermediate_repr = self.build_intermediate(program_data.get("instructions", []))
         
         # Сохраняем промежуточное представление
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -2,59 +2,100 @@ import argparse
 import sys
 import os
 import json  # Добавлен импорт json
-from assembler import VMAssembler
-from interpreter import VMInterpreter
 
-def main():
+# Ассемблер и интерпретатор импортируются лениво внутри команд,
+# чтобы запуск CLI не платил за неиспользуемые подсистемы
+
+# Подкоманды CLI; строится только парсер выбранной команды
+COMMAND_NAMES = ('assemble-bin', 'assemble-int', 'run-bin', 'run', 'test-array-copy', 'disasm', 'disasm-stats', 'worker')
+
+def build_parser(command=None):
+    """
+    Строит парсер аргументов. Для известной команды добавляется только
+    ее подпарсер, иначе (справка, ошибка) - все
+    """
     parser = argparse.ArgumentParser(description='Ассемблер и интерпретатор УВМ')
     subparsers = parser.add_subparsers(dest='command', help='Команда')
     
+    def wanted(name):
+        return command not in COMMAND_NAMES or name == command
+    
     # Парсер для ассемблирования в бинарный формат
-    asm_bin_parser = subparsers.add_parser('assemble-bin', help='Ассемблирование в бинарный формат')
-    asm_bin_parser.add_argument('source', help='Путь к исходному файлу JSON')
-    asm_bin_parser.add_argument('output', help='Путь к выходному бинарному файлу')  
-    asm_bin_parser.add_argument('--test', action='store_true', help='Режим тестирования')
+    if wanted('assemble-bin'):
+        asm_bin_parser = subparsers.add_parser('assemble-bin', help='Ассемблирование в бинарный формат')
+        asm_bin_parser.add_argument('source', help='Путь к исходному файлу JSON')
+        asm_bin_parser.add_argument('output', help='Путь к выходному бинарному файлу')  
+        asm_bin_parser.add_argument('--test', action='store_true', help='Режим тестирования')
     
     # Парсер для ассемблирования в промежуточное представление
-    asm_int_parser = subparsers.add_parser('assemble-int', help='Ассемблирование в промежуточное представление')
-    asm_int_parser.add_argument('source', help='Путь к исходному файлу JSON')
-    asm_int_parser.add_argument('output', help='Путь к выходному файлу промежуточного представления')
+    if wanted('assemble-int'):
+        asm_int_parser = subparsers.add_parser('assemble-int', help='Ассемблирование в промежуточное представление')
+        asm_int_parser.add_argument('source', help='Путь к исходному файлу JSON')
+        asm_int_parser.add_argument('output', help='Путь к выходному файлу промежуточного представления')
     
     # Парсер для запуска из бинарного формата
-    run_bin_parser = subparsers.add_parser('run-bin', help='Запуск программы из бинарного формата')
-    run_bin_parser.add_argument('program', help='Путь к бинарному файлу программы')
-    run_bin_parser.add_argument('--dump', help='Путь для сохранения дампа памяти')
-    run_bin_parser.add_argument('--start-addr', type=int, default=0, help='Начальный адрес для дампа')
-    run_bin_parser.add_argument('--end-addr', type=int, help='Конечный адрес для дампа')
+    if wanted('run-bin'):
+        run_bin_parser = subparsers.add_parser('run-bin', help='Запуск программы из бинарного формата')
+        run_bin_parser.add_argument('program', help='Путь к бинарному файлу программы')
+        run_bin_parser.add_argument('--dump', help='Путь для сохранения дампа памяти')
+        run_bin_parser.add_argument('--start-addr', type=int, default=0, help='Начальный адрес для дампа')
+        run_bin_parser.add_argument('--end-addr', type=int, help='Конечный адрес для дампа')
+        run_bin_parser.add_argument('--cache', help='Каталог кэша результатов выполнения')
     
     # Парсер для запуска из промежуточного представления
-    run_int_parser = subparsers.add_parser('run', help='Запуск программы из промежуточного представления')
-    run_int_parser.add_argument('program', help='Путь к файлу промежуточного представления')
-    run_int_parser.add_argument('--dump', required=True, help='Путь для сохранения дампа памяти')
-    run_int_parser.add_argument('--start-addr', type=int, default=0, help='Начальный адрес для дампа')
-    run_int_parser.add_argument('--end-addr', type=int, help='Конечный адрес для дампа')
+    if wanted('run'):
+        run_int_parser = subparsers.add_parser('run', help='Запуск программы из промежуточного представления')
+        run_int_parser.add_argument('program', help='Путь к файлу промежуточного представления')
+        run_int_parser.add_argument('--dump', required=True, help='Путь для сохранения дампа памяти')
+        run_int_parser.add_argument('--start-addr', type=int, default=0, help='Начальный адрес для дампа')
+        run_int_parser.add_argument('--end-addr', type=int, help='Конечный адрес для дампа')
+        run_int_parser.add_argument('--cache', help='Каталог кэша результатов выполнения')
     
     # Парсер для теста копирования массива
-    test_parser = subparsers.add_parser('test-array-copy', help='Тест копирования массива')
-    test_parser.add_argument('--dump', required=True, help='Путь для сохранения дампа памяти')
+    if wanted('test-array-copy'):
+        test_parser = subparsers.add_parser('test-array-copy', help='Тест копирования массива')
+        test_parser.add_argument('--dump', required=True, help='Путь для сохранения дампа памяти')
+    
+    # Парсер для дизассемблирования
+    if wanted('disasm'):
+        disasm_parser = subparsers.add_parser('disasm', help='Дизассемблирование бинарной программы')
+        disasm_parser.add_argument('program', help='Путь к бинарному файлу программы')
+        disasm_parser.add_argument('--output', help='Сохранить промежуточное представление в файл')
+        disasm_parser.add_argument('--strict', action='store_true', help='Ошибка при неполной последней инструкции')
+    
+    # Парсер для статистики по набору бинарных программ
+    if wanted('disasm-stats'):
+        stats_parser = subparsers.add_parser('disasm-stats', help='Статистика операций по бинарным программам')
+        stats_parser.add_argument('programs', nargs='+', help='Пути к бинарным файлам программ')
+    
+    # Парсер для режима постоянного обработчика
+    if wanted('worker'):
+        subparsers.add_parser('worker', help='Обработка потока заданий JSON lines из stdin')
     
+    return parser
+
+def main():
+    parser = build_parser(sys.argv[1] if len(sys.argv) > 1 else None)
     args = parser.parse_args()
     
     if args.command == 'assemble-bin':
+        from assembler import VMAssembler
         assembler = VMAssembler()
         assembler.assemble_to_binary(args.source, args.output, args.test)
         print(f"Программа успешно ассемблирована в бинарный формат: {args.output}")
         
     elif args.command == 'assemble-int':
+        from assembler import VMAssembler
         assembler = VMAssembler()
         assembler.assemble_to_intermediate(args.source, args.output)
         print(f"Программа успешно ассемблирована в промежуточное представление: {args.output}")
         
     elif args.command == 'run-bin':
+        from interpreter import VMInterpreter
         with open(args.program, 'rb') as f:
             program_bytes = f.read()
             
-        vm = VMInterpreter()
+        vm = VMInterpreter(result_cache=open_result_cache(args.cache))
         vm.load_program_from_binary(program_bytes)
         vm.run_from_binary()
         
@@ -67,9 +108,11 @@ def main():
         print(f"Счетчик команд: {state['pc']}")
         print(f"Выполнено инструкций: {state['instructions_executed']}")
         print(f"Память данных (первые 20 ячеек): {state['data_memory'][:20]}")
+        print(f"Выделено страниц памяти данных: {state['resident_pages']}")
         
     elif args.command == 'run':
-        vm = VMInterpreter()
+        from interpreter import VMInterpreter
+        vm = VMInterpreter(result_cache=open_result_cache(args.cache))
         vm.load_program_from_intermediate(args.program)
         vm.run_from_intermediate()
         
@@ -82,14 +125,107 @@ def main():
         print(f"Счетчик команд: {state['pc']}")
         print(f"Выполнено инструкций: {state['instructions_executed']}")
         print(f"Память данных (первые 20 ячеек): {state['data_memory'][:20]}")
+        print(f"Выделено страниц памяти данных: {state['resident_pages']}")
         
     elif args.command == 'test-array-copy':
         # Тестовая программа: копирование массива
         run_array_copy_test(args.dump)
         
+    elif args.command == 'disasm':
+        from disassembler import VMDisassembler
+        disassembler = VMDisassembler()
+        if args.output:
+            result = disassembler.disassemble_file(args.program, args.output, args.strict)
+            print(f"Дизассемблировано {result['metadata']['instruction_count']} инструкций: {args.output}")
+        else:
+            with open(args.program, 'rb') as f:
+                print("\n".join(disassembler.listing(f.read(), args.strict)))
+                
+    elif args.command == 'disasm-stats':
+        from disassembler import VMDisassembler
+        stats = VMDisassembler().statistics(args.programs)
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+        
+    elif args.command == 'worker':
+        run_worker(sys.stdin, sys.stdout)
+        
     else:
         parser.print_help()
 
+_result_caches = {}
+
+def open_result_cache(directory):
+    """
+    Кэш результатов для каталога (один объект на каталог за процесс)
+    """
+    if not directory:
+        return None
+    if directory not in _result_caches:
+        from result_cache import ResultCache
+        _result_caches[directory] = ResultCache(directory)
+    return _result_caches[directory]
+
+def handle_job(job):
+    """
+    Выполнение одного задания режима worker. Поля задания:
+    cmd - assemble-bin, assemble-int, run, run-bin или dump;
+    source/output - для ассемблирования; program, binary, max_steps,
+    start_addr, end_addr, dump (путь к файлу дампа), cache - для запуска
+    """
+    command = job.get('cmd')
+    
+    if command in ('assemble-bin', 'assemble-int'):
+        from assembler import VMAssembler
+        assembler = VMAssembler()
+        if command == 'assemble-bin':
+            binary_output, _ = assembler.assemble_to_binary(job['source'], job['output'])
+            return {'output': job['output'], 'size': len(binary_output)}
+        intermediate_repr = assembler.assemble_to_intermediate(job['source'], job['output'])
+        return {'output': job['output'], 'instruction_count': len(intermediate_repr)}
+        
+    if command in ('run', 'run-bin', 'dump'):
+        from interpreter import VMInterpreter
+        binary = command == 'run-bin' or job.get('binary', False)
+        vm = VMInterpreter(result_cache=open_result_cache(job.get('cache')), verbose=False)
+        max_steps = job.get('max_steps', 1000)
+        if binary:
+            with open(job['program'], 'rb') as f:
+                vm.load_program_from_binary(f.read())
+            vm.run_from_binary(max_steps)
+        else:
+            vm.load_program_from_intermediate(job['program'])
+            vm.run_from_intermediate(max_steps)
+            
+        start_addr = job.get('start_addr', 0)
+        end_addr = job.get('end_addr')
+        if job.get('dump'):
+            vm.save_memory_dump(job['dump'], start_addr, end_addr)
+        if command == 'dump':
+            return vm.dump_memory(start_addr, end_addr)
+        state = vm.get_state()
+        del state['data_memory']
+        return state
+        
+    raise ValueError(f"Неизвестная команда: {command}")
+
+def run_worker(stream_in, stream_out):
+    """
+    Постоянный обработчик: читает задания JSON lines и отвечает на каждое
+    одной строкой JSON без перезапуска интерпретатора Python
+    """
+    for line in stream_in:
+        if not line.strip():
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get('id')
+            response = {'id': job_id, 'ok': True, 'result': handle_job(job)}
+        except Exception as e:
+            response = {'id': job_id, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        stream_out.write(json.dumps(response, ensure_ascii=False) + '\n')
+        stream_out.flush()
+
 def run_array_copy_test(dump_file: str):
     """
     Тестовая программа для копирования массива
@@ -109,22 +245,11 @@ def run_array_copy_test(dump_file: str):
             {"op": "LOAD_CONST", "value": 40},   # Значение для ячейки 103
             {"op": "WRITE_MEM", "address": 103},
             
-            # Копирование массива из адресов 100-103 в 200-203
+            # Копирование массива из адресов 100-103 в 200-203 одной инструкцией
+            {"op": "LOAD_CONST", "value": 200},  # Целевой адрес
             {"op": "LOAD_CONST", "value": 100},  # Начальный адрес источника
-            {"op": "READ_MEM"},                  # Читаем значение
-            {"op": "WRITE_MEM", "address": 200}, # Записываем в целевой адрес
-            
-            {"op": "LOAD_CONST", "value": 101},
-            {"op": "READ_MEM"},
-            {"op": "WRITE_MEM", "address": 201},
-            
-            {"op": "LOAD_CONST", "value": 102}, 
-            {"op": "READ_MEM"},
-            {"op": "WRITE_MEM", "address": 202},
-            
-            {"op": "LOAD_CONST", "value": 103},
-            {"op": "READ_MEM"}, 
-            {"op": "WRITE_MEM", "address": 203},
+            {"op": "LOAD_CONST", "value": 4},    # Количество ячеек
+            {"op": "MEMCPY"},
             
             # Проверяем результат - читаем из целевого массива
             {"op": "LOAD_CONST", "value": 200},
@@ -143,6 +268,8 @@ def run_array_copy_test(dump_file: str):
         json.dump(test_program, f, indent=2, ensure_ascii=False)
     
     # Ассемблируем и запускаем
+    from assembler import VMAssembler
+    from interpreter import VMInterpreter
     assembler = VMAssembler()
     intermediate_repr = assembler.assemble_to_intermediate('test_array_copy.json', 'test_array_copy_intermediate.json')
     
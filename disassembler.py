@@ -0,0 +1,150 @@
+import json
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from interpreter import VMInterpreter
+
+class VMDisassembler:
+    """
+    Дизассемблер для учебной виртуальной машины (УВМ).
+    
+    Использует декодирование интерпретатора (VMInterpreter.decode_instruction)
+    и разбирает всю программу за один проход
+    """
+    
+    OPCODE_NAMES = VMInterpreter.OPCODE_NAMES
+    
+    # Название поля B в промежуточном представлении
+    OPERAND_FIELDS = {
+        "LOAD_CONST": "value",
+        "WRITE_MEM": "address",
+        "BINARY_OP": "address",
+        "JUMP": "target",
+        "JUMP_IF_ZERO": "target",
+    }
+    
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        """
+        Декодирование всей программы. Возвращает список инструкций
+        (смещение, A, B, размер) и описание неполной последней инструкции
+        """
+        instructions = []
+        truncated = None
+        end = len(data)
+        pc = 0
+        decode_instruction = VMInterpreter.decode_instruction
+        
+        while pc < end:
+            a, b, size = decode_instruction(data, pc, end)
+            if size == 0:
+                truncated = {"offset": pc, "bytes": list(data[pc:])}
+                break
+            instructions.append((pc, a, b, size))
+            pc += size
+            
+        return {"instructions": instructions, "truncated": truncated, "size": end}
+    
+    def _check_truncated(self, decoded: Dict[str, Any], strict: bool):
+        truncated = decoded["truncated"]
+        if truncated is not None and strict:
+            raise ValueError(f"Неполная инструкция по смещению {truncated['offset']}: "
+                             f"{[f'0x{byte:02X}' for byte in truncated['bytes']]}")
+    
+    def to_intermediate(self, data: bytes, strict: bool = False) -> Dict[str, Any]:
+        """
+        Преобразование бинарной программы в промежуточное представление
+        в формате VMAssembler.assemble_to_intermediate. Байтовые смещения
+        переходов заменяются номерами инструкций
+        """
+        decoded = self.decode(data)
+        self._check_truncated(decoded, strict)
+        
+        instructions = decoded["instructions"]
+        index_by_offset = {offset: index for index, (offset, _, _, _) in enumerate(instructions)}
+        # Переход на конец программы допустим; как и в
+        # VMInterpreter.build_binary_jump_table, концом считается размер
+        # программы, а не начало неполной последней инструкции
+        index_by_offset[decoded["size"]] = len(instructions)
+        
+        program = []
+        for offset, a, b, size in instructions:
+            op = self.OPCODE_NAMES[a]
+            instr = {"op": op}
+            field = self.OPERAND_FIELDS.get(op)
+            if field == "target":
+                if b not in index_by_offset:
+                    raise ValueError(f"Переход по смещению {offset} не на начало инструкции: {b}")
+                instr[field] = index_by_offset[b]
+            elif field is not None:
+                instr[field] = b
+            program.append(instr)
+            
+        metadata = {"instruction_count": len(program)}
+        if decoded["truncated"] is not None:
+            metadata["truncated"] = decoded["truncated"]
+        return {"program": program, "metadata": metadata}
+    
+    def listing(self, data: bytes, strict: bool = False) -> List[str]:
+        """
+        Текстовый листинг: смещение, байты, мнемоника и операнд
+        """
+        decoded = self.decode(data)
+        self._check_truncated(decoded, strict)
+        
+        lines = []
+        for offset, a, b, size in decoded["instructions"]:
+            op = self.OPCODE_NAMES[a]
+            raw = " ".join(f"{byte:02X}" for byte in data[offset:offset + size])
+            operand = f" {b}" if op in self.OPERAND_FIELDS else ""
+            lines.append(f"{offset:06X}:  {raw:<14}  {op}{operand}")
+            
+        truncated = decoded["truncated"]
+        if truncated is not None:
+            raw = " ".join(f"{byte:02X}" for byte in truncated["bytes"])
+            lines.append(f"{truncated['offset']:06X}:  {raw:<14}  ; неполная инструкция")
+        return lines
+    
+    def disassemble_file(self, program_file: str, output_file: Optional[str] = None,
+                         strict: bool = False) -> Dict[str, Any]:
+        """
+        Дизассемблирование бинарного файла в промежуточное представление
+        (с сохранением в output_file, если он указан)
+        """
+        with open(program_file, 'rb') as f:
+            data = f.read()
+            
+        result = self.to_intermediate(data, strict)
+        result["metadata"]["source_file"] = program_file
+        
+        if output_file:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+        return result
+    
+    def statistics(self, program_files: List[str]) -> Dict[str, Any]:
+        """
+        Статистика по набору бинарных программ: частоты операций,
+        число инструкций и байтов, файлы с неполной последней инструкцией
+        """
+        opcodes = Counter()
+        total_bytes = 0
+        total_instructions = 0
+        truncated_files = []
+        
+        for program_file in program_files:
+            with open(program_file, 'rb') as f:
+                data = f.read()
+            decoded = self.decode(data)
+            total_bytes += len(data)
+            total_instructions += len(decoded["instructions"])
+            opcodes.update(a for _, a, _, _ in decoded["instructions"])
+            if decoded["truncated"] is not None:
+                truncated_files.append(program_file)
+                
+        return {
+            "files": len(program_files),
+            "bytes": total_bytes,
+            "instructions": total_instructions,
+            "opcodes": {self.OPCODE_NAMES[a]: count for a, count in opcodes.most_common()},
+            "truncated_files": truncated_files
+        }
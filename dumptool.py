@@ -0,0 +1,254 @@
+"""
+Анализ дампов памяти УВМ (memory_dump.json) без полной загрузки.
+
+Файл дампа отображается в память (mmap) и просматривается регулярным
+выражением прямо по байтам. Разреженный индекс "адрес -> смещение в
+файле" сохраняется рядом с дампом (файл .idx), поэтому чтение диапазона
+адресов - это двоичный поиск по индексу и короткий просмотр от найденного
+смещения. Сравнение двух дампов идет слиянием упорядоченных потоков
+ячеек и не требует памяти, пропорциональной размеру дампов
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MEMORY_KEY = re.compile(rb'"memory_dump"\s*:\s*\{')
+CELL = re.compile(rb'\s*"(\d+)"\s*:\s*(-?\d+)\s*(,|\})')
+EMPTY = re.compile(rb'\s*\}')
+
+class MemoryDump:
+    """
+    Дамп памяти с произвольным доступом к ячейкам по адресу.
+
+    Ячейки в дампе, сохраненном VMInterpreter.save_memory_dump, идут по
+    возрастанию адресов; в индекс попадает каждая stride-я ячейка
+    """
+
+    INDEX_SUFFIX = ".idx"
+
+    def __init__(self, path: str, stride: int = 256, use_index_file: bool = True):
+        self.path = path
+        self.stride = stride
+        self.addresses: List[int] = []
+        self.offsets: List[int] = []
+        self.count = 0
+        self.data = b""
+        self.file = open(path, 'rb')
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            if size:
+                self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if not (use_index_file and self._load_index()):
+                self._build_index()
+                if use_index_file:
+                    self._try_save_index()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    @property
+    def index_path(self) -> str:
+        return self.path + self.INDEX_SUFFIX
+
+    def _signature(self) -> Dict[str, int]:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _start(self) -> int:
+        """
+        Смещение первой ячейки объекта memory_dump
+        """
+        match = MEMORY_KEY.search(self.data)
+        if match is None:
+            raise ValueError(f"В файле {self.path} нет объекта memory_dump")
+        return match.end()
+
+    def _scan(self, position: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Ячейки (смещение, адрес, значение), начиная со смещения position
+        """
+        if EMPTY.match(self.data, position):
+            return
+        while True:
+            match = CELL.match(self.data, position)
+            if match is None:
+                raise ValueError(f"Некорректная запись дампа {self.path} на смещении {position}")
+            yield position, int(match.group(1)), int(match.group(2))
+            if match.group(3) == b"}":
+                return
+            position = match.end()
+
+    def _build_index(self):
+        previous = None
+        for number, (offset, address, _) in enumerate(self._scan(self._start())):
+            if previous is not None and address <= previous:
+                raise ValueError(f"Адреса дампа {self.path} не упорядочены: {address} после {previous}")
+            if number % self.stride == 0:
+                self.addresses.append(address)
+                self.offsets.append(offset)
+            previous = address
+            self.count = number + 1
+
+    def _load_index(self) -> bool:
+        """
+        Чтение индекса из файла; False, если индекса нет или он устарел
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if index.get("source") != self._signature() or index.get("stride") != self.stride:
+            return False
+        self.addresses = index["addresses"]
+        self.offsets = index["offsets"]
+        self.count = index["count"]
+        return True
+
+    def save_index(self):
+        """
+        Сохранение индекса рядом с дампом
+        """
+        index = {
+            "source": self._signature(),
+            "stride": self.stride,
+            "count": self.count,
+            "addresses": self.addresses,
+            "offsets": self.offsets
+        }
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+
+    def _try_save_index(self):
+        # Дамп может лежать в каталоге только для чтения - тогда индекс
+        # остается только в памяти
+        try:
+            self.save_index()
+        except OSError:
+            pass
+
+    def cells(self, start_addr: int = 0, end_addr: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        Ячейки (адрес, значение) с адресами из [start_addr, end_addr)
+        """
+        if not self.addresses:
+            return
+        position = bisect.bisect_right(self.addresses, start_addr) - 1
+        offset = self.offsets[max(position, 0)]
+        for _, address, value in self._scan(offset):
+            if end_addr is not None and address >= end_addr:
+                return
+            if address >= start_addr:
+                yield address, value
+
+    def read_range(self, start_addr: int, end_addr: int) -> Dict[int, int]:
+        """
+        Словарь адрес -> значение для диапазона [start_addr, end_addr)
+        """
+        return dict(self.cells(start_addr, end_addr))
+
+    def __getitem__(self, address: int) -> Optional[int]:
+        for _, value in self.cells(address, address + 1):
+            return value
+        return None
+
+    def header(self) -> Dict[str, Any]:
+        """
+        Остальные поля дампа (стек, счетчик команд и т.д.) без ячеек памяти
+        """
+        start = self._start()
+        if self.offsets:
+            last = start
+            for last, _, _ in self._scan(self.offsets[-1]):
+                pass
+            end = CELL.match(self.data, last).end()
+        else:
+            end = EMPTY.match(self.data, start).end()
+        data = json.loads(bytes(self.data[:start]) + b"}" + bytes(self.data[end:]))
+        data.pop("memory_dump")
+        return data
+
+def diff_dumps(first: MemoryDump, second: MemoryDump, start_addr: int = 0,
+               end_addr: Optional[int] = None) -> Iterator[Tuple[int, Optional[int], Optional[int]]]:
+    """
+    Различающиеся ячейки (адрес, значение в first, значение в second);
+    None - ячейки нет в соответствующем дампе
+    """
+    left = first.cells(start_addr, end_addr)
+    right = second.cells(start_addr, end_addr)
+    a = next(left, None)
+    b = next(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a[0], a[1], None
+            a = next(left, None)
+        elif a is None or b[0] < a[0]:
+            yield b[0], None, b[1]
+            b = next(right, None)
+        else:
+            if a[1] != b[1]:
+                yield a[0], a[1], b[1]
+            a = next(left, None)
+            b = next(right, None)
+
+def main():
+    parser = argparse.ArgumentParser(description='Чтение и сравнение дампов памяти УВМ')
+    subparsers = parser.add_subparsers(dest='command', required=True, help='Команда')
+
+    index_parser = subparsers.add_parser('index', help='Построение индексов дампов')
+    index_parser.add_argument('dumps', nargs='+', help='Пути к файлам дампов')
+
+    get_parser = subparsers.add_parser('get', help='Чтение диапазона адресов')
+    get_parser.add_argument('dump', help='Путь к файлу дампа')
+    get_parser.add_argument('start_addr', type=int, help='Начальный адрес')
+    get_parser.add_argument('end_addr', type=int, nargs='?', help='Конечный адрес (не включительно)')
+
+    diff_parser = subparsers.add_parser('diff', help='Сравнение двух дампов')
+    diff_parser.add_argument('first', help='Первый дамп')
+    diff_parser.add_argument('second', help='Второй дамп')
+    diff_parser.add_argument('--start-addr', type=int, default=0, help='Начальный адрес')
+    diff_parser.add_argument('--end-addr', type=int, help='Конечный адрес (не включительно)')
+    diff_parser.add_argument('--limit', type=int, help='Максимальное количество выводимых различий')
+
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        for path in args.dumps:
+            with MemoryDump(path) as dump:
+                print(f"{path}: {dump.count} ячеек, {len(dump.addresses)} записей индекса")
+
+    elif args.command == 'get':
+        end_addr = args.end_addr if args.end_addr is not None else args.start_addr + 1
+        with MemoryDump(args.dump) as dump:
+            for address, value in dump.cells(args.start_addr, end_addr):
+                print(f"{address}\t{value}")
+
+    elif args.command == 'diff':
+        with MemoryDump(args.first) as first, MemoryDump(args.second) as second:
+            differences = 0
+            for address, a, b in diff_dumps(first, second, args.start_addr, args.end_addr):
+                differences += 1
+                if args.limit is None or differences <= args.limit:
+                    print(f"{address}\t{'-' if a is None else a}\t{'-' if b is None else b}")
+            print(f"Различий: {differences}", file=sys.stderr)
+        sys.exit(1 if differences else 0)
+
+if __name__ == '__main__':
+    main()
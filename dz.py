@@ -5,6 +5,11 @@
 # - Lark
 # - DSL (Domain Specific Language, предметно-ориентированные языки)
 
+import functools
+import io
+import os
+import threading
+
 import lark
 
 grammar = r"""
@@ -23,7 +28,7 @@ value: NUM | array | STR | assigh | ref
 %ignore /\*[^\n]+/  
 """
 
-class T(lark.Transformer):
+class T(lark.visitors.Transformer_NonRecursive):
     NAME = str
     NUM = str
     STR = str
@@ -45,28 +50,25 @@ class T(lark.Transformer):
     def start(self, items):
         return {"type": "root", "children": items}
 
-def to_xml(data, indent=0):
-    """Рекурсивно преобразует данные в XML"""
-    spaces = "  " * indent
-    
+# Контейнерные узлы: тип -> (поле с дочерними узлами, сдвиг отступа детей)
+_CONTAINERS = {
+    "root": ("children", 1),
+    "assignment": ("value", 2),
+    "array": ("values", 2),
+}
+
+def _open_tag(data):
+    xml_type = data["type"]
+    if xml_type == "assignment":
+        return f'<assignment name="{data["name"]}">', '</assignment>'
+    return f'<{xml_type}>', f'</{xml_type}>'
+
+def _leaf_xml(data, spaces):
+    """Преобразует лист дерева (ссылку, число, строку) в строку XML"""
     if isinstance(data, dict):
-        xml_type = data.get("type", "unknown")
-        
-        if xml_type == "root":
-            children_xml = "\n".join(to_xml(child, indent + 1) for child in data["children"])
-            return f'{spaces}<root>\n{children_xml}\n{spaces}</root>'
-        
-        elif xml_type == "assignment":
-            value_xml = to_xml(data["value"], indent + 2)
-            return f'{spaces}<assignment name="{data["name"]}">\n{value_xml}\n{spaces}</assignment>'
-        
-        elif xml_type == "array":
-            values_xml = "\n".join(to_xml(val, indent + 2) for val in data["values"])
-            return f'{spaces}<array>\n{values_xml}\n{spaces}</array>'
-        
-        elif xml_type == "reference":
+        if data.get("type") == "reference":
             return f'{spaces}<reference name="{data["name"]}" />'
-    
+
     elif isinstance(data, str):
         # Проверяем, является ли строка числом или строковым литералом
         if data.replace('.', '').isdigit():
@@ -78,13 +80,272 @@ def to_xml(data, indent=0):
     
     return f'{spaces}<unknown>{data}</unknown>'
 
-def transform(input: str) -> str:
-    parser = lark.Lark(grammar)
-    treee = parser.parse(input)
-    result = T(visit_tokens=True).transform(treee)
+def write_xml(data, out, indent=0):
+    """Записывает данные в XML в файлоподобный объект out.
+
+    Дерево обходится итеративно с явным стеком итераторов, поэтому
+    глубина вложенности не ограничена рекурсией, а строки пишутся
+    в out по мере обхода, без сборки промежуточных строк"""
+    separator = ""
+    # Элементы стека: (итератор по детям, отступ детей, закрывающая строка)
+    stack = [(iter((data,)), indent, None)]
+    
+    while stack:
+        children, level, closing = stack[-1]
+        child = next(children, stack)
+        
+        if child is stack:
+            stack.pop()
+            if closing is not None:
+                out.write(f'\n{closing}')
+            continue
+        
+        spaces = "  " * level
+        container = _CONTAINERS.get(child.get("type")) if isinstance(child, dict) else None
+        
+        if container is None:
+            out.write(separator + _leaf_xml(child, spaces))
+            separator = "\n"
+            continue
+        
+        field, shift = container
+        open_tag, close_tag = _open_tag(child)
+        out.write(f'{separator}{spaces}{open_tag}')
+        separator = "\n"
+        
+        nested = child[field]
+        if field == "value":
+            nested = (nested,)
+        if nested:
+            stack.append((iter(nested), level + shift, spaces + close_tag))
+        else:
+            out.write(f'\n\n{spaces}{close_tag}')
+
+def _collect_definitions(tree):
+    """Строит таблицу символов: имя определения -> узел значения.
+    При повторном определении имени действует последнее"""
+    symbols = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        container = _CONTAINERS.get(node.get("type")) if isinstance(node, dict) else None
+        if container is None:
+            continue
+        if node["type"] == "assignment":
+            symbols[node["name"]] = node["value"]
+        nested = node[container[0]]
+        stack.extend((nested,) if container[0] == "value" else reversed(nested))
+    return symbols
+
+def resolve_references(tree):
+    """Подставляет значения определений вместо ссылок #[NAME].
+
+    Каждое определение раскрывается один раз: результат запоминается
+    и переиспользуется всеми ссылками (общие поддеревья не копируются),
+    неизменившиеся поддеревья возвращаются как есть. Обход итеративный.
+    Циклические и неопределенные ссылки вызывают ValueError"""
+    symbols = _collect_definitions(tree)
+    resolved_names = {}
+    resolved_nodes = {}
+    in_progress = set()
+    
+    # Кадр: [узел, дети, индекс, новые дети, имя раскрываемого определения]
+    stack = [[None, [tree], 0, [], None]]
+    
+    while True:
+        frame = stack[-1]
+        node, children, index, new_children, name = frame
+        
+        if index == len(children):
+            stack.pop()
+            if node is None:
+                result = new_children[0]
+            elif all(new is old for new, old in zip(new_children, children)):
+                result = node
+            else:
+                field = _CONTAINERS[node["type"]][0]
+                result = dict(node)
+                result[field] = new_children[0] if field == "value" else new_children
+            if node is not None:
+                resolved_nodes[id(node)] = result
+            if name is not None:
+                resolved_names[name] = result
+                in_progress.discard(name)
+            if not stack:
+                return result
+            stack[-1][3].append(result)
+            stack[-1][2] += 1
+            continue
+        
+        child = children[index]
+        child_type = child.get("type") if isinstance(child, dict) else None
+        
+        if child_type == "reference":
+            ref_name = child["name"]
+            if ref_name in resolved_names:
+                new_children.append(resolved_names[ref_name])
+                frame[2] += 1
+            elif ref_name in in_progress:
+                raise ValueError(f"Циклическая ссылка на определение {ref_name}")
+            elif ref_name not in symbols:
+                raise ValueError(f"Ссылка на неопределенное имя {ref_name}")
+            else:
+                in_progress.add(ref_name)
+                stack.append([None, [symbols[ref_name]], 0, [], ref_name])
+        
+        elif child_type in _CONTAINERS:
+            if id(child) in resolved_nodes:
+                new_children.append(resolved_nodes[id(child)])
+                frame[2] += 1
+            else:
+                field = _CONTAINERS[child_type][0]
+                nested = [child[field]] if field == "value" else child[field]
+                stack.append([child, nested, 0, [], None])
+        
+        else:
+            new_children.append(child)
+            frame[2] += 1
+
+def to_xml(data, indent=0):
+    """Преобразует данные в XML строку"""
+    buffer = io.StringIO()
+    write_xml(data, buffer, indent)
+    return buffer.getvalue()
+
+@functools.lru_cache(maxsize=None)
+def get_parser(cache=True) -> lark.Lark:
+    """Возвращает парсер DSL, построенный один раз за процесс.
+
+    Грамматика разбирается LALR(1)-парсером, скомпилированная форма
+    которого сохраняется на диск (cache=True - во временный каталог,
+    строка - путь к файлу кэша). Если грамматика не LALR, используется Earley
+    """
+    try:
+        return lark.Lark(grammar, parser="lalr", cache=cache)
+    except lark.exceptions.GrammarError:
+        return lark.Lark(grammar)
+
+_transformer = T(visit_tokens=True)
+
+class XmlEvents(lark.Transformer):
+    """Встроенный в LALR-парсер обработчик, формирующий XML прямо во время разбора.
+
+    Свертки LALR идут снизу вверх, поэтому листья и закрывающие теги
+    дописываются в плоский список событий в порядке документа, а
+    открывающие теги контейнеров привязываются к индексу события, с
+    которого начинается их первый потомок. Каждое правило возвращает
+    этот начальный индекс вместо узла дерева"""
+
+    def begin(self):
+        self.events = []
+        self.opens = {}
+
+    def _leaf(self, data):
+        self.events.append((None, _leaf_xml(data, "")))
+        return len(self.events) - 1
+
+    def _container(self, start, data, shift):
+        open_tag, close_tag = _open_tag(data)
+        self.opens.setdefault(start, []).append((open_tag, shift))
+        self.events.append((shift, close_tag))
+        return start
+
+    def value(self, items):
+        item = items[0]
+        if isinstance(item, int):
+            return item
+        return self._leaf(str(item))
+
+    def ref(self, items):
+        return self._leaf({"type": "reference", "name": str(items[0])})
+
+    def assigh(self, items):
+        name, start = items
+        return self._container(start, {"type": "assignment", "name": str(name)}, 2)
+
+    def array(self, items):
+        return self._container(items[0], {"type": "array"}, 2)
+
+    def start(self, items):
+        return self._container(items[0], {"type": "root"}, 1)
+
+    def write(self, out, indent=0):
+        """Записывает накопленные события в out с расстановкой отступов"""
+        level = indent
+        shifts = []
+        separator = ""
+        for index, (shift, text) in enumerate(self.events):
+            for open_tag, open_shift in reversed(self.opens.get(index, ())):
+                out.write(f'{separator}{"  " * level}{open_tag}')
+                separator = "\n"
+                shifts.append(open_shift)
+                level += open_shift
+            if shift is not None:
+                level -= shifts.pop()
+            out.write(f'{separator}{"  " * level}{text}')
+            separator = "\n"
+
+_direct_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def get_direct_parser(cache=True):
+    """Возвращает LALR-парсер со встроенным XmlEvents: дерево Lark
+    и промежуточные словари при разборе не строятся"""
+    events = XmlEvents()
+    return lark.Lark(grammar, parser="lalr", transformer=events, cache=cache), events
+
+def transform(input: str, direct: bool = False, resolve: bool = False) -> str:
+    if direct and resolve:
+        raise ValueError("Разрешение ссылок недоступно в однопроходном режиме")
+    if direct:
+        buffer = io.StringIO()
+        transform_to(input, buffer, direct=True)
+        return buffer.getvalue()
+    treee = get_parser().parse(input)
+    result = _transformer.transform(treee)
+    if resolve:
+        result = resolve_references(result)
     xml_output = to_xml(result)
     return xml_output
 
+def transform_to(input: str, out, direct: bool = False, resolve: bool = False) -> None:
+    """Преобразует документ DSL и пишет XML в файлоподобный объект out.
+
+    direct=True - однопроходный режим: XML формируется во время разбора,
+    resolve=True - ссылки заменяются значениями определений"""
+    if direct and resolve:
+        raise ValueError("Разрешение ссылок недоступно в однопроходном режиме")
+    if direct:
+        parser, events = get_direct_parser()
+        with _direct_lock:
+            events.begin()
+            parser.parse(input)
+            events.write(out)
+        return
+    treee = get_parser().parse(input)
+    result = _transformer.transform(treee)
+    if resolve:
+        result = resolve_references(result)
+    write_xml(result, out)
+
+def transform_many(inputs, direct: bool = False, resolve: bool = False) -> list:
+    """Преобразует набор документов DSL в XML одним общим парсером"""
+    return [transform(text, direct, resolve) for text in inputs]
+
+def transform_files(paths, output_dir=None, direct: bool = False, resolve: bool = False) -> list:
+    """Преобразует файлы DSL в XML, сохраняя результат рядом с исходником
+    (или в output_dir). Возвращает список путей к XML файлам"""
+    outputs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        base = os.path.splitext(os.path.basename(path))[0] + ".xml"
+        out_path = os.path.join(output_dir or os.path.dirname(path), base)
+        with open(out_path, "w", encoding="utf-8") as f:
+            transform_to(text, f, direct, resolve)
+        outputs.append(out_path)
+    return outputs
+
 INPUT = '''
 * Это однострочный комментарий
 def name = 1.0
@@ -92,4 +353,5 @@ def name = 1.0
 ({7.0, ({3.1, #[name] }), 7.1, "Hello world"})
 '''
 
-print(transform(INPUT))
\ No newline at end of file
+if __name__ == "__main__":
+    print(transform(INPUT))
\ No newline at end of file
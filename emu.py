@@ -1,15 +1,261 @@
+import argparse
+import posixpath
 import shlex
-while True:
-    a = input("vfs@ ")
-    b = shlex.split(a)
-    if a == "exit":
-        break
-    if len(b) == 0:
-        continue
-    if b[0] == "ls":
-        print(b)
-    elif b[0] == "cd":
-        print(b)
+import sys
+import tarfile
+import time
+import zipfile
+
+
+class VFSNode:
+    """Узел виртуальной файловой системы: каталог (children не None) или файл"""
+    __slots__ = ("name", "parent", "children", "loader", "data", "listing")
+
+    def __init__(self, name, parent=None, is_dir=False, loader=None):
+        self.name = name
+        self.parent = parent
+        self.children = {} if is_dir else None
+        self.loader = loader  # Распаковывает содержимое файла по запросу
+        self.data = None
+        self.listing = None   # Кэш отсортированного списка имен каталога
+
+    @property
+    def is_dir(self):
+        return self.children is not None
+
+
+def _read_member(archive, member):
+    """Содержимое элемента tar; ссылки, которые не удается разрешить
+    внутри архива, и специальные файлы читаются как пустые"""
+    try:
+        f = archive.extractfile(member)
+    except KeyError:
+        return b""
+    return f.read() if f is not None else b""
+
+
+class VFS:
+    """
+    Виртуальная файловая система в памяти, загружаемая из zip или tar образа.
+
+    Все пути хранятся в индексе "абсолютный путь -> узел", поэтому
+    разрешение пути сводится к нормализации и одному поиску в словаре.
+    Содержимое файлов распаковывается только при первом чтении
+    """
+
+    def __init__(self):
+        self.root = VFSNode("", is_dir=True)
+        self.index = {"/": self.root}
+        self.cwd = "/"
+        self.archive = None
+
+    @classmethod
+    def from_image(cls, image_path):
+        vfs = cls()
+        if zipfile.is_zipfile(image_path):
+            archive = zipfile.ZipFile(image_path)
+            for info in archive.infolist():
+                vfs._add(info.filename, info.is_dir(),
+                         None if info.is_dir() else (lambda info=info: archive.read(info)))
+        elif tarfile.is_tarfile(image_path):
+            archive = tarfile.open(image_path)
+            for member in archive:
+                vfs._add(member.name, member.isdir(),
+                         None if member.isdir() else (lambda member=member: _read_member(archive, member)))
+        else:
+            raise ValueError(f"Неподдерживаемый формат образа: {image_path}")
+        vfs.archive = archive
+        return vfs
+
+    @staticmethod
+    def normalize(path):
+        return posixpath.normpath("/" + path.lstrip("/"))
+
+    def _add(self, path, is_dir, loader):
+        """Добавляет элемент образа; элемент внутри пути, занятого
+        файлом, пропускается с сообщением в stderr"""
+        try:
+            return self._insert(self.normalize(path), is_dir, loader)
+        except ValueError as e:
+            sys.stderr.write(f"Пропущен элемент образа {path}: {e}\n")
+            return None
+
+    def _insert(self, path, is_dir, loader):
+        # path уже нормализован; недостающие родительские каталоги создаются
+        node = self.index.get(path)
+        if node is not None:
+            return node
+        parent_path, _, name = path.rpartition("/")
+        parent = self._insert(parent_path or "/", True, None)
+        if not parent.is_dir:
+            raise ValueError(f"{parent_path} является файлом")
+        node = VFSNode(name, parent, is_dir, loader)
+        parent.children[name] = node
+        self.index[path] = node
+        return node
+
+    def abspath(self, path):
+        return self.normalize(posixpath.join(self.cwd, path))
+
+    def lookup(self, path):
+        """Возвращает узел по абсолютному или относительному пути или None"""
+        return self.index.get(self.abspath(path))
+
+    def listdir(self, node):
+        if node.listing is None:
+            node.listing = sorted(node.children)
+        return node.listing
+
+    def read(self, node):
+        if node.data is None:
+            node.data = node.loader() if node.loader else b""
+        return node.data
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+
+def cmd_pwd(vfs, args, out):
+    out.write(vfs.cwd + "\n")
+
+
+def cmd_ls(vfs, args, out):
+    for path in args or ["."]:
+        node = vfs.lookup(path)
+        if node is None:
+            out.write(f"ls: {path}: No such file or directory\n")
+        elif node.is_dir:
+            listing = vfs.listdir(node)
+            if listing:
+                out.write("\n".join(listing) + "\n")
+        else:
+            out.write(node.name + "\n")
+
+
+def cmd_cd(vfs, args, out):
+    path = args[0] if args else "/"
+    node = vfs.lookup(path)
+    if node is None:
+        out.write(f"cd: {path}: No such file or directory\n")
+    elif not node.is_dir:
+        out.write(f"cd: {path}: Not a directory\n")
     else:
-        print(f'{b[0]}: command not found')
+        vfs.cwd = vfs.abspath(path)
+
+
+def cmd_cat(vfs, args, out):
+    for path in args:
+        node = vfs.lookup(path)
+        if node is None:
+            out.write(f"cat: {path}: No such file or directory\n")
+        elif node.is_dir:
+            out.write(f"cat: {path}: Is a directory\n")
+        else:
+            out.write(vfs.read(node).decode("utf-8", errors="replace"))
+
+
+COMMANDS = {
+    "pwd": cmd_pwd,
+    "ls": cmd_ls,
+    "cd": cmd_cd,
+    "cat": cmd_cat,
+}
+
+
+def cmd_syntax_error(vfs, args, out):
+    out.write(f"syntax error: {args[0]}\n")
+
+
+def parse_line(line):
+    """Разбирает одну строку: (обработчик, аргументы, имя) или None
+    для пустой строки. Ошибка разбора (например, незакрытая кавычка)
+    становится командой, сообщающей об этой ошибке"""
+    try:
+        b = shlex.split(line)
+    except ValueError as e:
+        return cmd_syntax_error, [str(e).lower()], line.strip()
+    if not b:
+        return None
+    return COMMANDS.get(b[0]), b[1:], b[0]
+
+
+def parse_script(lines):
+    """Лениво разбирает поток команд: (обработчик, аргументы, имя).
+    Строки читаются по мере выполнения, разбор останавливается на exit"""
+    for line in lines:
+        command = parse_line(line)
+        if command is None:
+            continue
+        if command[2] == "exit":
+            return
+        yield command
+
+
+def dispatch(vfs, handler, args, name, out):
+    """Выполняет разобранную команду; неизвестная команда сообщается в out"""
+    if handler is None:
+        out.write(f'{name}: command not found\n')
+    else:
+        handler(vfs, args, out)
+
+
+def run_command(vfs, b, out=None):
+    dispatch(vfs, COMMANDS.get(b[0]), b[1:], b[0], out or sys.stdout)
+
+
+def run_script(vfs, lines, out=None, timing=False, flush=False):
+    """Неинтерактивное выполнение потока команд с буферизованным выводом.
+    Строки читаются по мере выполнения; flush=True сбрасывает вывод после
+    каждой команды (для работы в терминале), иначе - один раз в конце.
+    Возвращает список (команда, время выполнения в секундах)"""
+    out = out or sys.stdout
+    timings = []
+    for handler, args, name in parse_script(lines):
+        started = time.perf_counter()
+        dispatch(vfs, handler, args, name, out)
+        timings.append((name, time.perf_counter() - started))
+        if flush:
+            out.flush()
+    out.flush()
+    
+    if timing:
+        for index, (name, seconds) in enumerate(timings, 1):
+            sys.stderr.write(f"{index}\t{name}\t{seconds * 1e6:.1f} мкс\n")
+        total = sum(seconds for _, seconds in timings)
+        sys.stderr.write(f"Всего: {len(timings)} команд за {total * 1e3:.3f} мс\n")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Эмулятор оболочки над образом VFS')
+    parser.add_argument('image', nargs='?', help='Путь к zip или tar образу')
+    parser.add_argument('--script', help='Файл с командами для неинтерактивного выполнения')
+    parser.add_argument('--timing', action='store_true', help='Выводить время выполнения команд')
+    args = parser.parse_args()
+
+    vfs = VFS.from_image(args.image) if args.image else VFS()
+    try:
+        if args.script:
+            with open(args.script, 'r', encoding='utf-8') as f:
+                run_script(vfs, f, timing=args.timing)
+            return
+        if not sys.stdin.isatty():
+            run_script(vfs, sys.stdin, timing=args.timing, flush=sys.stdout.isatty())
+            return
+        while True:
+            a = input("vfs@ ")
+            command = parse_line(a)
+            if command is None:
+                continue
+            handler, command_args, name = command
+            if name == "exit":
+                break
+            dispatch(vfs, handler, command_args, name, sys.stdout)
+    finally:
+        vfs.close()
+
 
+if __name__ == "__main__":
+    main()
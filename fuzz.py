@@ -0,0 +1,202 @@
+"""
+Дифференциальный фаззинг исполнения программ УВМ.
+
+Случайные программы и начальные образы памяти выполняются всеми
+зарегистрированными движками (из промежуточного представления и из
+бинарного формата), итоговые состояния сравниваются. Расхождения
+сохраняются вместе с воспроизводящими данными
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from assembler import VMAssembler
+from interpreter import VMInterpreter
+
+# Движок: (программа, начальная память {адрес: значение}, max_steps) -> состояние
+ENGINES: Dict[str, Callable[[List[Dict[str, Any]], Dict[int, int], int], Dict[str, Any]]] = {}
+
+def register_engine(name: str, engine):
+    """
+    Регистрация движка исполнения для сравнения
+    """
+    ENGINES[name] = engine
+
+def normalized_state(vm: VMInterpreter) -> Dict[str, Any]:
+    """
+    Состояние ВМ, сравнимое между движками: счетчик команд не
+    включается (байтовое смещение против номера инструкции), нулевые
+    страницы памяти отбрасываются
+    """
+    return {
+        "stack": list(vm.stack),
+        "pages": {index: page.hex() for index, page in sorted(vm.data_memory.pages.items()) if any(page)},
+        "instructions_executed": vm.instructions_executed
+    }
+
+def make_vm(memory: Dict[int, int], fuse: bool = False) -> VMInterpreter:
+    vm = VMInterpreter(verbose=False, fuse_superinstructions=fuse)
+    for address, value in memory.items():
+        vm.data_memory[address] = value & 0xFF
+    return vm
+
+def run_intermediate_engine(program, memory, max_steps, fuse=False):
+    vm = make_vm(memory, fuse)
+    vm.set_intermediate_program(VMAssembler().build_intermediate(program))
+    vm.run_from_intermediate(max_steps)
+    return normalized_state(vm)
+
+def run_binary_engine(program, memory, max_steps, fuse=False):
+    vm = make_vm(memory, fuse)
+    vm.load_program_from_binary(VMAssembler().encode_program(program))
+    vm.run_from_binary(max_steps)
+    return normalized_state(vm)
+
+register_engine("intermediate", run_intermediate_engine)
+register_engine("binary", run_binary_engine)
+register_engine("fused-intermediate",
+                lambda program, memory, max_steps: run_intermediate_engine(program, memory, max_steps, True))
+register_engine("fused-binary",
+                lambda program, memory, max_steps: run_binary_engine(program, memory, max_steps, True))
+
+def generate_case(rng: random.Random, max_length: int, aligned: bool) -> Dict[str, Any]:
+    """
+    Случайная программа и начальная память. В режиме aligned константы
+    и адреса точно представимы в бинарном формате (LOAD_CONST хранит
+    биты 7..31, адреса - биты 6..20)
+    """
+    const_step = 128 if aligned else 1
+    address_step = 64 if aligned else 1
+    
+    def constant():
+        return rng.randrange(0, 4096, const_step)
+    
+    def address():
+        return rng.randrange(0, 4096, address_step)
+    
+    length = rng.randint(1, max_length)
+    program = []
+    for _ in range(length):
+        op = rng.choice(("LOAD_CONST", "LOAD_CONST", "READ_MEM", "WRITE_MEM", "BINARY_OP",
+                         "JUMP", "JUMP_IF_ZERO", "MEMCPY", "MEMSET"))
+        if op == "LOAD_CONST":
+            program.append({"op": op, "value": constant()})
+        elif op in ("WRITE_MEM", "BINARY_OP"):
+            program.append({"op": op, "address": address()})
+        elif op in ("JUMP", "JUMP_IF_ZERO"):
+            program.append({"op": op, "target": rng.randint(0, length)})
+        else:
+            program.append({"op": op})
+            
+    memory = {rng.randrange(0, 4096, const_step): rng.randrange(256)
+              for _ in range(rng.randint(0, 16))}
+    return {"program": program, "memory": memory}
+
+def check_case(case: Dict[str, Any], max_steps: int, engines: List[str]) -> Dict[str, Any]:
+    """
+    Выполнение случая всеми движками. Возвращает описание расхождения или None
+    """
+    results = {}
+    for name in engines:
+        try:
+            results[name] = ENGINES[name](case["program"], case["memory"], max_steps)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            
+    reference_name = engines[0]
+    reference = results[reference_name]
+    for name in engines[1:]:
+        if results[name] != reference:
+            fields = sorted(key for key in set(reference) | set(results[name])
+                            if reference.get(key) != results[name].get(key))
+            return {"engines": [reference_name, name], "fields": fields,
+                    "case": case, "results": {reference_name: reference, name: results[name]}}
+    return None
+
+def fuzz_batch(task) -> Dict[str, Any]:
+    """
+    Пакет случаев для одного рабочего процесса
+    """
+    seed, count, max_length, max_steps, aligned, engines = task
+    rng = random.Random(seed)
+    mismatches = []
+    for _ in range(count):
+        case = generate_case(rng, max_length, aligned)
+        mismatch = check_case(case, max_steps, engines)
+        if mismatch is not None:
+            # Ключи памяти в JSON - строки
+            mismatch["case"]["memory"] = {str(k): v for k, v in mismatch["case"]["memory"].items()}
+            mismatches.append(mismatch)
+    return {"cases": count, "mismatches": mismatches}
+
+def run_fuzzer(cases: int, workers: int = None, batch_size: int = 500, max_length: int = 32,
+               max_steps: int = 200, aligned: bool = False, seed: int = 0,
+               engines: List[str] = None, max_reports: int = 100) -> Dict[str, Any]:
+    """
+    Параллельный фаззинг: пакеты случаев распределяются по рабочим процессам
+    """
+    engines = engines or list(ENGINES)
+    tasks = []
+    remaining = cases
+    batch_seed = seed
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        tasks.append((batch_seed, count, max_length, max_steps, aligned, engines))
+        remaining -= count
+        batch_seed += 1
+        
+    started = time.perf_counter()
+    done = 0
+    mismatch_count = 0
+    reports = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(fuzz_batch, tasks):
+            done += result["cases"]
+            mismatch_count += len(result["mismatches"])
+            reports.extend(result["mismatches"][:max_reports - len(reports)])
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "cases": done,
+        "mismatches": mismatch_count,
+        "seconds": elapsed,
+        "programs_per_second": done / elapsed if elapsed else 0.0,
+        "engines": engines,
+        "reports": reports
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Дифференциальный фаззинг движков исполнения УВМ')
+    parser.add_argument('--cases', type=int, default=10000, help='Количество случайных программ')
+    parser.add_argument('--workers', type=int, help='Количество рабочих процессов')
+    parser.add_argument('--batch-size', type=int, default=500, help='Случаев в одном пакете')
+    parser.add_argument('--max-length', type=int, default=32, help='Максимальная длина программы')
+    parser.add_argument('--max-steps', type=int, default=200, help='Ограничение шагов выполнения')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное зерно генератора')
+    parser.add_argument('--aligned', action='store_true',
+                        help='Только значения, точно представимые в бинарном формате')
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), help='Сравниваемые движки')
+    parser.add_argument('--output', help='Файл JSON для найденных расхождений')
+    args = parser.parse_args()
+    
+    summary = run_fuzzer(args.cases, args.workers, args.batch_size, args.max_length,
+                         args.max_steps, args.aligned, args.seed, args.engines)
+    
+    print(f"Движки: {', '.join(summary['engines'])}")
+    print(f"Проверено программ: {summary['cases']} за {summary['seconds']:.2f} с "
+          f"({summary['programs_per_second']:.0f} программ/с)")
+    print(f"Расхождений: {summary['mismatches']}")
+    for report in summary["reports"][:5]:
+        print(f"  {report['engines'][0]} / {report['engines'][1]}: различаются {', '.join(report['fields'])}")
+        
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"Отчет сохранен в {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,207 @@
 import json
 import sys
+from collections import Counter
 from typing import List, Dict, Any, Tuple, Optional
 
+class PagedMemory:
+    """
+    Разреженная страничная память данных.
+    
+    Страницы (bytearray по PAGE_SIZE ячеек) выделяются при первой записи,
+    чтение нетронутых страниц возвращает нули. Поддерживает индексацию
+    и срезы с шагом 1 как обычный список байтов
+    """
+    
+    PAGE_BITS = 12
+    PAGE_SIZE = 1 << PAGE_BITS
+    
+    def __init__(self, size: int = 1 << 21):
+        self.size = size
+        self.pages: Dict[int, bytearray] = {}
+        
+    def __len__(self) -> int:
+        return self.size
+        
+    def _read_page(self, index: int) -> Optional[bytearray]:
+        return self.pages.get(index)
+        
+    def _write_page(self, index: int) -> bytearray:
+        page = self.pages.get(index)
+        if page is None:
+            page = bytearray(self.PAGE_SIZE)
+            self.pages[index] = page
+        return page
+        
+    def _chunks(self, start: int, stop: int):
+        # Разбиение диапазона адресов на куски внутри страниц
+        while start < stop:
+            index = start >> self.PAGE_BITS
+            offset = start & (self.PAGE_SIZE - 1)
+            length = min(self.PAGE_SIZE - offset, stop - start)
+            yield index, offset, length
+            start += length
+            
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.size)
+            if step != 1:
+                return [self[addr] for addr in range(start, stop, step)]
+            result = []
+            for index, offset, length in self._chunks(start, stop):
+                page = self._read_page(index)
+                if page is None:
+                    result.extend([0] * length)
+                else:
+                    result.extend(page[offset:offset + length])
+            return result
+            
+        if not 0 <= key < self.size:
+            raise IndexError(f"Адрес {key} вне памяти данных")
+        page = self._read_page(key >> self.PAGE_BITS)
+        return 0 if page is None else page[key & (self.PAGE_SIZE - 1)]
+        
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.size)
+            if step != 1:
+                raise ValueError("Срезы с шагом не поддерживаются")
+            value = bytes(value)
+            if len(value) != stop - start:
+                raise ValueError("Размер присваиваемого блока не совпадает со срезом")
+            position = 0
+            for index, offset, length in self._chunks(start, stop):
+                chunk = value[position:position + length]
+                position += length
+                # Запись нулей в нетронутую страницу не требует ее выделения
+                if self._read_page(index) is None and not any(chunk):
+                    continue
+                self._write_page(index)[offset:offset + length] = chunk
+            return
+            
+        if not 0 <= key < self.size:
+            raise IndexError(f"Адрес {key} вне памяти данных")
+        self._write_page(key >> self.PAGE_BITS)[key & (self.PAGE_SIZE - 1)] = value
+        
+    def resident_pages(self) -> int:
+        """
+        Количество выделенных страниц
+        """
+        return len(self.pages)
+        
+    def image_key(self) -> bytes:
+        """
+        Образ содержимого памяти для ключа кэша результатов
+        """
+        return json.dumps({str(index): page.hex() for index, page
+                           in sorted(self.pages.items())}).encode()
+
+class SharedMemorySegment:
+    """
+    Сегмент данных только для чтения в multiprocessing.shared_memory.
+    
+    Создается один раз в родительском процессе, рабочие процессы
+    подключаются к нему по описанию (descriptor) без копирования данных.
+    Сегмент выровнен по страницам PagedMemory, чтобы каждая его страница
+    отдавалась как memoryview без копирования
+    """
+    
+    def __init__(self, shm, first_page: int, page_count: int, digest: str, owner: bool):
+        self.shm = shm
+        self.first_page = first_page
+        self.page_count = page_count
+        self.digest = digest
+        self.owner = owner
+        self.buffer = shm.buf
+        
+    @classmethod
+    def create(cls, start_addr: int, data: List[int]) -> 'SharedMemorySegment':
+        """
+        Размещение массива data с адреса start_addr в разделяемой памяти
+        """
+        page_size = PagedMemory.PAGE_SIZE
+        first_page = start_addr // page_size
+        end_page = -(-(start_addr + len(data)) // page_size)
+        page_count = max(end_page - first_page, 1)
+        
+        import hashlib
+        from multiprocessing import shared_memory
+        
+        shm = shared_memory.SharedMemory(create=True, size=page_count * page_size)
+        offset = start_addr - first_page * page_size
+        shm.buf[offset:offset + len(data)] = bytes(value & 0xFF for value in data)
+        digest = hashlib.sha256(shm.buf[:page_count * page_size]).hexdigest()
+        return cls(shm, first_page, page_count, digest, owner=True)
+        
+    @classmethod
+    def attach(cls, descriptor: Dict[str, Any]) -> 'SharedMemorySegment':
+        """
+        Подключение к сегменту, созданному в другом процессе
+        """
+        from multiprocessing import shared_memory
+        
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=descriptor["name"], track=False)
+        else:
+            # Рабочие процессы пула используют трекер ресурсов родителя,
+            # повторная регистрация имени в нем ничего не меняет
+            shm = shared_memory.SharedMemory(name=descriptor["name"])
+        return cls(shm, descriptor["first_page"], descriptor["page_count"],
+                   descriptor["digest"], owner=False)
+        
+    @property
+    def descriptor(self) -> Dict[str, Any]:
+        return {"name": self.shm.name, "first_page": self.first_page,
+                "page_count": self.page_count, "digest": self.digest}
+        
+    def page(self, index: int):
+        """
+        Страница сегмента как memoryview или None, если страница вне сегмента
+        """
+        local = index - self.first_page
+        if not 0 <= local < self.page_count:
+            return None
+        start = local * PagedMemory.PAGE_SIZE
+        return self.buffer[start:start + PagedMemory.PAGE_SIZE]
+        
+    def close(self):
+        """
+        Отключение от сегмента; владелец также удаляет его
+        """
+        self.buffer.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class LayeredMemory(PagedMemory):
+    """
+    Память данных из общего сегмента только для чтения и частных страниц.
+    
+    Чтение нетронутой страницы идет из разделяемого сегмента без
+    копирования; при первой записи страница копируется в частный слой
+    этой ВМ (копирование при записи)
+    """
+    
+    def __init__(self, base: SharedMemorySegment, size: int = 1 << 21):
+        super().__init__(size)
+        self.base = base
+        
+    def _read_page(self, index: int):
+        page = self.pages.get(index)
+        if page is None:
+            return self.base.page(index)
+        return page
+        
+    def _write_page(self, index: int) -> bytearray:
+        page = self.pages.get(index)
+        if page is None:
+            shared = self.base.page(index)
+            page = bytearray(shared) if shared is not None else bytearray(self.PAGE_SIZE)
+            self.pages[index] = page
+        return page
+        
+    def image_key(self) -> bytes:
+        return self.base.digest.encode() + super().image_key()
+
 class VMInterpreter:
     """
     Интерпретатор для учебной виртуальной машины с раздельной памятью
@@ -9,18 +209,57 @@ class VMInterpreter:
     
     # Коды операций
     OP_READ_MEM = 0
+    OP_JUMP = 1
+    OP_JUMP_IF_ZERO = 2
     OP_BINARY_OP = 3  
+    OP_MEMCPY = 4
     OP_WRITE_MEM = 5
+    OP_MEMSET = 6
     OP_LOAD_CONST = 7
     
-    def __init__(self, code_memory_size=4096, data_memory_size=4096):
-        # Раздельная память: код и данные
+    JUMP_OPS = ("JUMP", "JUMP_IF_ZERO")
+    
+    OPCODE_NAMES = {0: "READ_MEM", 1: "JUMP", 2: "JUMP_IF_ZERO", 3: "BINARY_OP",
+                    4: "MEMCPY", 5: "WRITE_MEM", 6: "MEMSET", 7: "LOAD_CONST"}
+    
+    # Внутренние суперинструкции, формируемые при загрузке программы
+    PLAIN = 0
+    MOVE_CELL = 1      # LOAD_CONST c; READ_MEM; WRITE_MEM a  ->  mem[a] = mem[c]
+    READ_ABS = 2       # LOAD_CONST c; READ_MEM              ->  push mem[c]
+    MOVE_INDIRECT = 3  # READ_MEM; WRITE_MEM a               ->  mem[a] = mem[pop]
+    STORE_CONST = 4    # LOAD_CONST v; WRITE_MEM a           ->  mem[a] = v
+    FUSION_NAMES = {1: "MOVE_CELL", 2: "READ_ABS", 3: "MOVE_INDIRECT", 4: "STORE_CONST"}
+    
+    def __init__(self, code_memory_size=4096, data_memory_size=1 << 21, result_cache=None,
+                 verbose=True, fuse_superinstructions=True):
+        # Раздельная память: код и данные. Память данных покрывает все
+        # 21-битное адресное пространство, страницы выделяются по мере записи
         self.code_memory = [0] * code_memory_size
-        self.data_memory = [0] * data_memory_size
+        self.data_memory = PagedMemory(data_memory_size)
         self.stack = []
         self.pc = 0  # Program counter
+        self.instruction_pc = 0  # Адрес начала текущей инструкции
+        self.program_size = code_memory_size
+        self.jump_table = {}  # Адрес инструкции перехода -> адрес цели
         self.halted = False
         self.instructions_executed = 0
+        self.result_cache = result_cache  # ResultCache или None
+        self.verbose = verbose  # Печатать ли трассировку выполнения
+        self.fuse_superinstructions = fuse_superinstructions
+        self.superinstructions = None  # Адрес -> элемент слитой программы
+        self.superinstructions_binary = False  # Для какого формата она построена
+        self.fusion_sites = Counter()  # Слияния, найденные при загрузке
+        self.fusion_hits = Counter()   # Выполнения слитых инструкций
+        
+    def log(self, message: str, *args):
+        """
+        Вывод сообщения трассировки (отключается параметром verbose).
+        Аргументы подставляются в message через str.format только при
+        включенной трассировке, чтобы тихий режим не тратил время на
+        форматирование в цикле выполнения
+        """
+        if self.verbose:
+            print(message.format(*args) if args else message)
         
     def load_program_from_binary(self, program_bytes: bytes):
         """
@@ -29,7 +268,19 @@ class VMInterpreter:
         for i, byte in enumerate(program_bytes):
             if i < len(self.code_memory):
                 self.code_memory[i] = byte
-        print(f"Загружено {len(program_bytes)} байт в память команд")
+        self.program_size = min(len(program_bytes), len(self.code_memory))
+        self.jump_table = self.build_binary_jump_table()
+        if self.fuse_superinstructions:
+            decoded = []
+            pc = 0
+            while pc < self.program_size:
+                a, b, size = self.decode_instruction(self.code_memory, pc, self.program_size)
+                if a is None:
+                    break
+                decoded.append((pc, self.OPCODE_NAMES[a], b, pc + size, (a, b)))
+                pc += size
+            self.build_superinstructions(decoded, binary=True)
+        self.log("Загружено {} байт в память команд", len(program_bytes))
                 
     def load_program_from_intermediate(self, intermediate_file: str):
         """
@@ -38,48 +289,158 @@ class VMInterpreter:
         with open(intermediate_file, 'r', encoding='utf-8') as f:
             program_data = json.load(f)
         
-        self.intermediate_program = program_data.get("program", [])
+        self.set_intermediate_program(program_data.get("program", []))
+        self.log("Загружена программа из {}: {} инструкций", intermediate_file, len(self.intermediate_program))
+        
+    def set_intermediate_program(self, program: List[Dict[str, Any]]):
+        """
+        Установка программы в промежуточном представлении
+        с построением таблицы переходов
+        """
+        self.intermediate_program = program
         self.pc = 0
-        print(f"Загружена программа из {intermediate_file}: {len(self.intermediate_program)} инструкций")
+        self.jump_table = {}
+        for index, instruction in enumerate(program):
+            if instruction.get("op", "").upper() in self.JUMP_OPS:
+                target = instruction["target"]
+                if not 0 <= target <= len(program):
+                    raise ValueError(f"Переход из инструкции {index} вне программы: {target}")
+                self.jump_table[index] = target
+        if self.fuse_superinstructions:
+            self.build_superinstructions([
+                (index, instruction.get("op", "").upper(),
+                 instruction.get("value", instruction.get("address")), index + 1, instruction)
+                for index, instruction in enumerate(program)
+            ], binary=False)
         
-    def read_instruction_from_binary(self) -> Tuple[Optional[int], Optional[int]]:
+    def build_superinstructions(self, decoded: List[Tuple[int, str, Any, int, Any]], binary: bool):
         """
-        Чтение инструкции из бинарной памяти команд
+        Слияние частых последовательностей инструкций в суперинструкции.
+        
+        decoded - список (адрес, операция, операнд, адрес следующей,
+        исходная инструкция). Последовательность не сливается, если на
+        одну из ее инструкций, кроме первой, есть переход
         """
-        if self.pc >= len(self.code_memory):
-            return None, None
-            
-        first_byte = self.code_memory[self.pc]
+        targets = set(self.jump_table.values())
+        count = len(decoded)
+        
+        def op_at(i):
+            if i < count and decoded[i][0] not in targets:
+                return decoded[i][1]
+            return None
+        
+        compiled = {}
+        self.fusion_sites = Counter()
+        i = 0
+        while i < count:
+            pc, op, operand, next_pc, original = decoded[i]
+            fused = None
+            if op == "LOAD_CONST" and op_at(i + 1) == "READ_MEM":
+                if op_at(i + 2) == "WRITE_MEM":
+                    fused = (self.MOVE_CELL, operand, decoded[i + 2][2], 3)
+                else:
+                    fused = (self.READ_ABS, operand, None, 2)
+            elif op == "LOAD_CONST" and op_at(i + 1) == "WRITE_MEM":
+                fused = (self.STORE_CONST, operand, decoded[i + 1][2], 2)
+            elif op == "READ_MEM" and op_at(i + 1) == "WRITE_MEM":
+                fused = (self.MOVE_INDIRECT, decoded[i + 1][2], None, 2)
+                
+            if fused is None:
+                compiled[pc] = (self.PLAIN, None, None, 1, next_pc, original)
+                i += 1
+            else:
+                kind, x, y, length = fused
+                compiled[pc] = (kind, x, y, length, decoded[i + length - 1][3], None)
+                self.fusion_sites[self.FUSION_NAMES[kind]] += 1
+                i += length
+                
+        self.superinstructions = compiled
+        self.superinstructions_binary = binary
+        self.fusion_hits = Counter()
+        
+    def fusion_statistics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Статистика слияний: найденные при загрузке и выполненные
+        """
+        return {"sites": dict(self.fusion_sites), "hits": dict(self.fusion_hits)}
+        
+    @staticmethod
+    def decode_instruction(code, pc: int, end: int) -> Tuple[Optional[int], Optional[int], int]:
+        """
+        Декодирование инструкции по адресу pc из байтов code[:end].
+        Возвращает (A, B, размер); для неполной инструкции A равно None
+        и размер 0, для неизвестного кода операции - A равно None и размер 1
+        """
+        first_byte = code[pc]
         a_field = (first_byte >> 5) & 0x7
         
         if a_field == 7:  # LOAD_CONST - 5 байт
-            if self.pc + 4 >= len(self.code_memory):
-                return None, None
+            if pc + 4 >= end:
+                return None, None, 0
                 
             b_field = ((first_byte & 0x1F) << 27) | \
-                     (self.code_memory[self.pc + 1] << 22) | \
-                     (self.code_memory[self.pc + 2] << 17) | \
-                     (self.code_memory[self.pc + 3] << 12) | \
-                     (self.code_memory[self.pc + 4] << 7)
-            self.pc += 5
+                     (code[pc + 1] << 22) | \
+                     (code[pc + 2] << 17) | \
+                     (code[pc + 3] << 12) | \
+                     (code[pc + 4] << 7)
+            return a_field, b_field, 5
             
-        elif a_field == 0:  # READ_MEM - 1 байт
-            b_field = 0
-            self.pc += 1
+        elif a_field in [0, 4, 6]:  # READ_MEM, MEMCPY, MEMSET - 1 байт
+            return a_field, 0, 1
             
         elif a_field in [3, 5]:  # BINARY_OP, WRITE_MEM - 3 байта
-            if self.pc + 2 >= len(self.code_memory):
-                return None, None
+            if pc + 2 >= end:
+                return None, None, 0
                 
             b_field = ((first_byte & 0x1F) << 16) | \
-                     (self.code_memory[self.pc + 1] << 11) | \
-                     (self.code_memory[self.pc + 2] << 6)
-            self.pc += 3
+                     (code[pc + 1] << 11) | \
+                     (code[pc + 2] << 6)
+            return a_field, b_field, 3
             
-        else:
-            self.pc += 1
+        elif a_field in [1, 2]:  # JUMP, JUMP_IF_ZERO - 3 байта
+            if pc + 2 >= end:
+                return None, None, 0
+                
+            b_field = ((first_byte & 0x1F) << 16) | \
+                     (code[pc + 1] << 8) | \
+                     code[pc + 2]
+            return a_field, b_field, 3
+            
+        return None, None, 1
+        
+    def build_binary_jump_table(self) -> Dict[int, int]:
+        """
+        Предварительный проход по загруженной программе: проверка, что
+        каждый переход указывает на начало инструкции или конец программы
+        """
+        starts = set()
+        jumps = {}
+        pc = 0
+        while pc < self.program_size:
+            a, b, size = self.decode_instruction(self.code_memory, pc, self.program_size)
+            if a is None:
+                break
+            starts.add(pc)
+            if a in (self.OP_JUMP, self.OP_JUMP_IF_ZERO):
+                jumps[pc] = b
+            pc += size
+        starts.add(self.program_size)
+        
+        for pc, target in jumps.items():
+            if target not in starts:
+                raise ValueError(f"Переход по адресу {pc} не на начало инструкции: {target}")
+        return jumps
+        
+    def read_instruction_from_binary(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Чтение инструкции из бинарной памяти команд
+        """
+        if self.pc >= self.program_size:
             return None, None
             
+        self.instruction_pc = self.pc
+        a_field, b_field, size = self.decode_instruction(self.code_memory, self.pc, self.program_size)
+        self.pc += size
         return a_field, b_field
         
     def read_instruction_from_intermediate(self) -> Optional[Dict[str, Any]]:
@@ -89,10 +450,68 @@ class VMInterpreter:
         if self.pc >= len(self.intermediate_program):
             return None
             
+        self.instruction_pc = self.pc
         instruction = self.intermediate_program[self.pc]
         self.pc += 1
         return instruction
         
+    def check_block(self, name: str, start: int, count: int) -> bool:
+        """
+        Однократная проверка границ блока памяти данных
+        """
+        if count < 0 or start < 0 or start + count > len(self.data_memory):
+            self.log("{}: ошибка - блок {}..{} вне диапазона", name, start, start + count - 1)
+            return False
+        return True
+        
+    def execute_block_copy(self):
+        """
+        MEMCPY: копирование count ячеек из src в dst одной операцией над срезом.
+        Операнды в стеке (снизу вверх): dst, src, count
+        """
+        if len(self.stack) < 3:
+            self.log("MEMCPY: ошибка - недостаточно операндов в стеке")
+            return
+        count = self.stack.pop()
+        src = self.stack.pop()
+        dst = self.stack.pop()
+        if self.check_block("MEMCPY", src, count) and self.check_block("MEMCPY", dst, count):
+            self.data_memory[dst:dst + count] = self.data_memory[src:src + count]
+            self.log("MEMCPY: скопировано {} ячеек из {} в {}", count, src, dst)
+            
+    def execute_block_fill(self):
+        """
+        MEMSET: заполнение count ячеек начиная с dst значением value.
+        Операнды в стеке (снизу вверх): dst, value, count
+        """
+        if len(self.stack) < 3:
+            self.log("MEMSET: ошибка - недостаточно операндов в стеке")
+            return
+        count = self.stack.pop()
+        value = self.stack.pop()
+        dst = self.stack.pop()
+        if self.check_block("MEMSET", dst, count):
+            self.data_memory[dst:dst + count] = [value & 0xFF] * count
+            self.log("MEMSET: {} ячеек с адреса {} заполнено значением {}", count, dst, value)
+        
+    def execute_jump(self, conditional: bool):
+        """
+        Выполнение перехода по предварительно построенной таблице
+        """
+        target = self.jump_table[self.instruction_pc]
+        if not conditional:
+            self.pc = target
+            self.log("JUMP: переход на {}", target)
+        elif self.stack:
+            value = self.stack.pop()
+            if value == 0:
+                self.pc = target
+                self.log("JUMP_IF_ZERO: значение 0, переход на {}", target)
+            else:
+                self.log("JUMP_IF_ZERO: значение {}, переход не выполнен", value)
+        else:
+            self.log("JUMP_IF_ZERO: ошибка - стек пуст")
+        
     def execute_instruction(self, a: int, b: int):
         """
         Выполнение инструкции из бинарного формата
@@ -101,7 +520,7 @@ class VMInterpreter:
         
         if a == 7:  # LOAD_CONST
             self.stack.append(b)
-            print(f"LOAD_CONST: загружена константа {b} в стек")
+            self.log("LOAD_CONST: загружена константа {} в стек", b)
             
         elif a == 0:  # READ_MEM
             if self.stack:
@@ -109,23 +528,23 @@ class VMInterpreter:
                 if 0 <= addr < len(self.data_memory):
                     value = self.data_memory[addr]
                     self.stack.append(value)
-                    print(f"READ_MEM: прочитано значение {value} из адреса {addr}")
+                    self.log("READ_MEM: прочитано значение {} из адреса {}", value, addr)
                 else:
                     self.stack.append(0)
-                    print(f"READ_MEM: ошибка - адрес {addr} вне диапазона")
+                    self.log("READ_MEM: ошибка - адрес {} вне диапазона", addr)
             else:
-                print("READ_MEM: ошибка - стек пуст")
+                self.log("READ_MEM: ошибка - стек пуст")
                     
         elif a == 5:  # WRITE_MEM
             if self.stack:
                 value = self.stack.pop()
                 if 0 <= b < len(self.data_memory):
                     self.data_memory[b] = value & 0xFF
-                    print(f"WRITE_MEM: записано значение {value} по адресу {b}")
+                    self.log("WRITE_MEM: записано значение {} по адресу {}", value, b)
                 else:
-                    print(f"WRITE_MEM: ошибка - адрес {b} вне диапазона")
+                    self.log("WRITE_MEM: ошибка - адрес {} вне диапазона", b)
             else:
-                print("WRITE_MEM: ошибка - стек пуст")
+                self.log("WRITE_MEM: ошибка - стек пуст")
                     
         elif a == 3:  # BINARY_OP
             if len(self.stack) >= 2:
@@ -133,9 +552,18 @@ class VMInterpreter:
                 op1 = self.stack.pop()
                 result = op1 + op2  # Простая операция - сложение
                 self.stack.append(result)
-                print(f"BINARY_OP: {op1} + {op2} = {result}")
+                self.log("BINARY_OP: {} + {} = {}", op1, op2, result)
             else:
-                print("BINARY_OP: ошибка - недостаточно операндов в стеке")
+                self.log("BINARY_OP: ошибка - недостаточно операндов в стеке")
+                
+        elif a in (1, 2):  # JUMP, JUMP_IF_ZERO
+            self.execute_jump(conditional=(a == 2))
+            
+        elif a == 4:  # MEMCPY
+            self.execute_block_copy()
+            
+        elif a == 6:  # MEMSET
+            self.execute_block_fill()
                 
     def execute_intermediate_instruction(self, instruction: Dict[str, Any]):
         """
@@ -147,7 +575,7 @@ class VMInterpreter:
         if op == "LOAD_CONST":
             value = instruction["value"]
             self.stack.append(value)
-            print(f"LOAD_CONST: загружена константа {value} в стек")
+            self.log("LOAD_CONST: загружена константа {} в стек", value)
             
         elif op == "READ_MEM":
             if self.stack:
@@ -155,12 +583,12 @@ class VMInterpreter:
                 if 0 <= addr < len(self.data_memory):
                     value = self.data_memory[addr]
                     self.stack.append(value)
-                    print(f"READ_MEM: прочитано значение {value} из адреса {addr}")
+                    self.log("READ_MEM: прочитано значение {} из адреса {}", value, addr)
                 else:
                     self.stack.append(0)
-                    print(f"READ_MEM: ошибка - адрес {addr} вне диапазона")
+                    self.log("READ_MEM: ошибка - адрес {} вне диапазона", addr)
             else:
-                print("READ_MEM: ошибка - стек пуст")
+                self.log("READ_MEM: ошибка - стек пуст")
                 
         elif op == "WRITE_MEM":
             if self.stack:
@@ -168,11 +596,11 @@ class VMInterpreter:
                 address = instruction["address"]
                 if 0 <= address < len(self.data_memory):
                     self.data_memory[address] = value & 0xFF
-                    print(f"WRITE_MEM: записано значение {value} по адресу {address}")
+                    self.log("WRITE_MEM: записано значение {} по адресу {}", value, address)
                 else:
-                    print(f"WRITE_MEM: ошибка - адрес {address} вне диапазона")
+                    self.log("WRITE_MEM: ошибка - адрес {} вне диапазона", address)
             else:
-                print("WRITE_MEM: ошибка - стек пуст")
+                self.log("WRITE_MEM: ошибка - стек пуст")
                 
         elif op == "BINARY_OP":
             if len(self.stack) >= 2:
@@ -180,15 +608,157 @@ class VMInterpreter:
                 op1 = self.stack.pop()
                 result = op1 + op2
                 self.stack.append(result)
-                print(f"BINARY_OP: {op1} + {op2} = {result}")
+                self.log("BINARY_OP: {} + {} = {}", op1, op2, result)
             else:
-                print("BINARY_OP: ошибка - недостаточно операндов в стеке")
+                self.log("BINARY_OP: ошибка - недостаточно операндов в стеке")
                 
+        elif op in self.JUMP_OPS:
+            self.execute_jump(conditional=(op == "JUMP_IF_ZERO"))
+            
+        elif op == "MEMCPY":
+            self.execute_block_copy()
+            
+        elif op == "MEMSET":
+            self.execute_block_fill()
+                
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Полное состояние ВМ после выполнения (память данных - только
+        выделенные страницы) в сериализуемом виде
+        """
+        return {
+            "pages": {str(index): page.hex() for index, page in self.data_memory.pages.items()},
+            "stack": self.stack,
+            "pc": self.pc,
+            "halted": self.halted,
+            "instructions_executed": self.instructions_executed
+        }
+        
+    def import_state(self, state: Dict[str, Any]):
+        """
+        Восстановление состояния, сохраненного export_state
+        """
+        self.data_memory.pages = {int(index): bytearray.fromhex(page)
+                                  for index, page in state["pages"].items()}
+        self.stack = list(state["stack"])
+        self.pc = state["pc"]
+        self.halted = state["halted"]
+        self.instructions_executed = state["instructions_executed"]
+        
+    def program_image(self, kind: str) -> bytes:
+        """
+        Загруженная программа в виде байтов для ключа кэша
+        """
+        if kind == "binary":
+            return b"binary" + bytes(self.code_memory[:self.program_size])
+        return b"intermediate" + json.dumps(self.intermediate_program, sort_keys=True).encode()
+        
+    def cache_key(self, kind: str, max_steps: int) -> str:
+        """
+        Ключ кэша: программа и все начальное состояние ВМ
+        """
+        program = self.program_image(kind)
+        memory_image = self.data_memory.image_key()
+        # Размеры памяти влияют на результат: записи за ее пределы отбрасываются
+        initial_state = json.dumps([self.stack, self.pc, self.halted,
+                                    self.instructions_executed, max_steps,
+                                    len(self.code_memory), len(self.data_memory)]).encode()
+        return self.result_cache.make_key(program, memory_image, initial_state)
+        
+    def run_cached(self, kind: str, run, max_steps: int):
+        """
+        Выполнение через кэш результатов: при попадании состояние
+        восстанавливается без выполнения программы
+        """
+        if self.result_cache is None:
+            run(max_steps)
+            return
+            
+        key = self.cache_key(kind, max_steps)
+        state = self.result_cache.get(key)
+        if state is not None:
+            self.import_state(state)
+            self.log("Результат взят из кэша ({} инструкций)", self.instructions_executed)
+            return
+            
+        run(max_steps)
+        self.result_cache.put(key, self.export_state())
+        
     def run_from_binary(self, max_steps=1000):
         """
         Запуск интерпретатора из бинарного формата
         """
+        self.run_cached("binary", self._run_binary, max_steps)
+        
+    def _read_cell(self, address: int) -> int:
+        if 0 <= address < len(self.data_memory):
+            return self.data_memory[address]
+        self.log("READ_MEM: ошибка - адрес {} вне диапазона", address)
+        return 0
+        
+    def _write_cell(self, address: int, value: int):
+        if 0 <= address < len(self.data_memory):
+            self.data_memory[address] = value & 0xFF
+        else:
+            self.log("WRITE_MEM: ошибка - адрес {} вне диапазона", address)
+        
+    def run_superinstructions(self, max_steps: int, binary: bool) -> int:
+        """
+        Выполнение слитой программы. Возвращает число выполненных исходных
+        инструкций; останавливается в конце программы или когда очередная
+        суперинструкция не укладывается в max_steps
+        """
         steps = 0
+        compiled = self.superinstructions
+        while not self.halted and steps < max_steps:
+            entry = compiled.get(self.pc)
+            if entry is None:
+                break
+            kind, x, y, length, next_pc, original = entry
+            if steps + length > max_steps:
+                break
+                
+            if kind == self.PLAIN:
+                self.instruction_pc = self.pc
+                self.pc = next_pc
+                if binary:
+                    self.execute_instruction(*original)
+                else:
+                    self.execute_intermediate_instruction(original)
+                steps += 1
+                continue
+                
+            self.pc = next_pc
+            self.instructions_executed += length
+            steps += length
+            self.fusion_hits[self.FUSION_NAMES[kind]] += 1
+            
+            if kind == self.MOVE_CELL:
+                value = self._read_cell(x)
+                self._write_cell(y, value)
+                self.log("MOVE_CELL: значение {} скопировано из {} в {}", value, x, y)
+            elif kind == self.READ_ABS:
+                value = self._read_cell(x)
+                self.stack.append(value)
+                self.log("READ_ABS: прочитано значение {} из адреса {}", value, x)
+            elif kind == self.STORE_CONST:
+                self._write_cell(y, x)
+                self.log("STORE_CONST: записано значение {} по адресу {}", x, y)
+            elif kind == self.MOVE_INDIRECT:
+                if self.stack:
+                    address = self.stack.pop()
+                    value = self._read_cell(address)
+                    self._write_cell(x, value)
+                    self.log("MOVE_INDIRECT: значение {} скопировано из {} в {}", value, address, x)
+                else:
+                    self.log("MOVE_INDIRECT: ошибка - стек пуст")
+                    
+        return steps
+        
+    def _run_binary(self, max_steps):
+        steps = 0
+        if self.superinstructions is not None and self.superinstructions_binary:
+            steps = self.run_superinstructions(max_steps, binary=True)
         while not self.halted and steps < max_steps:
             a, b = self.read_instruction_from_binary()
             if a is None:
@@ -196,13 +766,18 @@ class VMInterpreter:
             self.execute_instruction(a, b)
             steps += 1
             
-        print(f"Выполнено {steps} инструкций")
+        self.log("Выполнено {} инструкций", steps)
         
     def run_from_intermediate(self, max_steps=1000):
         """
         Запуск интерпретатора из промежуточного представления
         """
+        self.run_cached("intermediate", self._run_intermediate, max_steps)
+        
+    def _run_intermediate(self, max_steps):
         steps = 0
+        if self.superinstructions is not None and not self.superinstructions_binary:
+            steps = self.run_superinstructions(max_steps, binary=False)
         while not self.halted and steps < max_steps:
             instruction = self.read_instruction_from_intermediate()
             if instruction is None:
@@ -210,7 +785,7 @@ class VMInterpreter:
             self.execute_intermediate_instruction(instruction)
             steps += 1
             
-        print(f"Выполнено {steps} инструкций")
+        self.log("Выполнено {} инструкций", steps)
         
     def dump_memory(self, start_addr: int = 0, end_addr: int = None) -> Dict[str, Any]:
         """
@@ -229,6 +804,7 @@ class VMInterpreter:
             "memory_dump": memory_dump,
             "range": f"{start_addr}-{end_addr-1}",
             "total_memory_size": len(self.data_memory),
+            "resident_pages": self.data_memory.resident_pages(),
             "stack": self.stack,
             "instructions_executed": self.instructions_executed,
             "program_counter": self.pc
@@ -243,7 +819,7 @@ class VMInterpreter:
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(dump_data, f, indent=2, ensure_ascii=False)
             
-        print(f"Дамп памяти сохранен в {output_file} (адреса {dump_data['range']})")
+        self.log("Дамп памяти сохранен в {} (адреса {})", output_file, dump_data['range'])
         
     def initialize_memory_with_array(self, start_addr: int, data: List[int]):
         """
@@ -253,7 +829,17 @@ class VMInterpreter:
             if start_addr + i < len(self.data_memory):
                 self.data_memory[start_addr + i] = value & 0xFF
                 
-        print(f"Память инициализирована массивом из {len(data)} элементов с адреса {start_addr}")
+        self.log("Память инициализирована массивом из {} элементов с адреса {}", len(data), start_addr)
+        
+    def attach_shared_memory(self, descriptor: Dict[str, Any]) -> SharedMemorySegment:
+        """
+        Подключение разделяемого сегмента (созданного SharedMemorySegment.create)
+        как базового слоя памяти данных; записи ВМ попадают в частные страницы
+        """
+        segment = SharedMemorySegment.attach(descriptor)
+        self.data_memory = LayeredMemory(segment, len(self.data_memory))
+        self.log("Подключен разделяемый сегмент {}: {} страниц", descriptor['name'], segment.page_count)
+        return segment
         
     def get_state(self):
         """
@@ -263,5 +849,6 @@ class VMInterpreter:
             'data_memory': self.data_memory[:100],
             'stack': self.stack,
             'pc': self.pc,
-            'instructions_executed': self.instructions_executed
+            'instructions_executed': self.instructions_executed,
+            'resident_pages': self.data_memory.resident_pages()
         }
\ No newline at end of file
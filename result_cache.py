@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+class ResultCache:
+    """
+    Дисковый кэш результатов выполнения программ УВМ.
+    
+    Программа УВМ - детерминированная функция от кода и начального
+    состояния, поэтому итоговое состояние можно сохранить по хэшу этих
+    данных. Каждая запись - отдельный JSON файл; при переполнении
+    удаляются записи, к которым дольше всего не обращались (LRU по mtime)
+    """
+    
+    def __init__(self, directory: str, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        
+    @staticmethod
+    def make_key(*parts: bytes) -> str:
+        """
+        Хэш частей ключа (программа, образ памяти, начальное состояние)
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+        
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+        
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает сохраненное состояние или None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Обновляем время доступа для LRU; запись могла быть уже
+        # вытеснена другим процессом, прочитанное состояние при этом верно
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return state
+        
+    def put(self, key: str, state: Dict[str, Any]):
+        """
+        Сохраняет состояние и вытесняет старые записи при переполнении
+        """
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+        self.evict()
+        
+    def evict(self):
+        """
+        Удаляет самые старые записи сверх max_entries. Каталог может
+        одновременно изменяться другими процессами, поэтому исчезнувшие
+        записи пропускаются
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+
+import dz
+
+class TestParser(unittest.TestCase):
+
+    def test_parser_built_once(self):
+        """Парсер строится один раз и переиспользуется"""
+        self.assertIs(dz.get_parser(), dz.get_parser())
+
+    def test_transform_files(self):
+        """Пакетное преобразование файлов дает тот же XML, что и transform"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "config.dsl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(dz.INPUT)
+            outputs = dz.transform_files([path])
+            with open(outputs[0], encoding="utf-8") as f:
+                self.assertEqual(f.read(), dz.transform(dz.INPUT))
+        self.assertEqual(dz.transform_many([dz.INPUT, dz.INPUT]), [dz.transform(dz.INPUT)] * 2)
+
+class TestXmlOutput(unittest.TestCase):
+
+    def test_write_xml_matches_to_xml(self):
+        """Потоковая запись совпадает со строковым результатом"""
+        tree = dz._transformer.transform(dz.get_parser().parse(dz.INPUT))
+        buffer = io.StringIO()
+        dz.write_xml(tree, buffer)
+        self.assertEqual(buffer.getvalue(), dz.to_xml(tree))
+
+    def test_deep_nesting(self):
+        """Глубокая вложенность не упирается в предел рекурсии"""
+        depth = 5000
+        text = '({' * depth + '1.0' + '})' * depth
+        xml = dz.transform(text)
+        self.assertEqual(xml.count('<array>'), depth)
+        self.assertIn('<number value="1.0" />', xml)
+
+    def test_direct_matches_default(self):
+        """Однопроходный режим дает тот же XML, что и построение дерева"""
+        for text in (dz.INPUT, 'def x = ({1.0, #[y]}) "a" 2.0', '({' * 50 + '1.0' + '})' * 50):
+            self.assertEqual(dz.transform(text, direct=True), dz.transform(text))
+
+class TestReferences(unittest.TestCase):
+
+    def test_reference_replaced(self):
+        """Ссылка заменяется значением определения"""
+        xml = dz.transform(dz.INPUT, resolve=True)
+        self.assertNotIn('<reference', xml)
+        self.assertEqual(xml.count('<number value="1.0" />'), 2)
+
+    def test_shared_definition(self):
+        """Определение раскрывается один раз и разделяется всеми ссылками"""
+        tree = dz._transformer.transform(dz.get_parser().parse(
+            'def a = ({1.0}) def b = ({#[a], #[a]})'))
+        resolved = dz.resolve_references(tree)
+        first, second = resolved["children"][1]["value"]["values"]
+        self.assertIs(first, second)
+
+    def test_invalid_references(self):
+        """Циклические и неопределенные ссылки вызывают ValueError"""
+        for text in ('def a = #[b] def b = #[a]', '#[missing]'):
+            with self.assertRaises(ValueError):
+                dz.transform(text, resolve=True)
+        with self.assertRaises(ValueError):
+            dz.transform(dz.INPUT, direct=True, resolve=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import contextlib
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from emu import COMMANDS, VFS, run_command, run_script
+
+class TestVFS(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_zip(self, entries):
+        path = os.path.join(self.tmp.name, "image.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, data in entries:
+                archive.writestr(name, data)
+        return path
+
+    def run_commands(self, vfs, *commands):
+        out = io.StringIO()
+        for command in commands:
+            run_command(vfs, command.split(), out)
+        return out.getvalue()
+
+    def test_zip_image(self):
+        """Файлы и промежуточные каталоги образа доступны по путям"""
+        path = self.make_zip([("docs/guide/readme.txt", b"hello\n"), ("top.txt", b"top\n")])
+        vfs = VFS.from_image(path)
+        self.addCleanup(vfs.close)
+
+        self.assertTrue(vfs.lookup("/docs/guide").is_dir)
+        self.assertEqual(vfs.read(vfs.lookup("docs/guide/readme.txt")), b"hello\n")
+        self.assertIsNone(vfs.lookup("/missing"))
+        self.assertEqual(self.run_commands(vfs, "ls", "cd docs/guide", "pwd", "cat readme.txt", "cd ../.."),
+                         "docs\ntop.txt\n/docs/guide\nhello\n")
+        self.assertEqual(vfs.cwd, "/")
+
+    def test_command_errors(self):
+        """Ошибочные пути сообщаются, а не прерывают работу"""
+        vfs = VFS.from_image(self.make_zip([("top.txt", b"top\n")]))
+        self.addCleanup(vfs.close)
+        self.assertEqual(self.run_commands(vfs, "cd top.txt", "cat /", "ls nope", "rm x"),
+                         "cd: top.txt: Not a directory\ncat: /: Is a directory\n"
+                         "ls: nope: No such file or directory\nrm: command not found\n")
+
+    def test_file_directory_conflict(self):
+        """Элемент внутри пути, занятого файлом, пропускается"""
+        path = self.make_zip([("a", b"file"), ("a/b.txt", b"nested"), ("c.txt", b"c")])
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            vfs = VFS.from_image(path)
+        self.addCleanup(vfs.close)
+
+        self.assertIn("a/b.txt", errors.getvalue())
+        self.assertFalse(vfs.lookup("/a").is_dir)
+        self.assertIsNone(vfs.lookup("/a/b.txt"))
+        self.assertEqual(vfs.read(vfs.lookup("/c.txt")), b"c")
+
+    def test_tar_dangling_link(self):
+        """Неразрешимая ссылка и специальный файл в tar читаются как пустые"""
+        path = os.path.join(self.tmp.name, "image.tar")
+        with tarfile.open(path, "w") as archive:
+            data = tarfile.TarInfo("etc/hosts")
+            data.size = 4
+            archive.addfile(data, io.BytesIO(b"host"))
+            link = tarfile.TarInfo("etc/broken")
+            link.type = tarfile.SYMTYPE
+            link.linkname = "/nowhere"
+            archive.addfile(link)
+            pipe = tarfile.TarInfo("etc/pipe")
+            pipe.type = tarfile.FIFOTYPE
+            archive.addfile(pipe)
+        vfs = VFS.from_image(path)
+        self.addCleanup(vfs.close)
+
+        self.assertEqual(self.run_commands(vfs, "ls etc", "cat etc/hosts", "cat etc/broken", "cat etc/pipe"),
+                         "broken\nhosts\npipe\nhost")
+
+class TestScript(unittest.TestCase):
+
+    def setUp(self):
+        self.vfs = VFS()
+        self.vfs._add("home/user/notes.txt", False, lambda: b"notes\n")
+
+    def test_dispatch_table(self):
+        """Каждая команда оболочки зарегистрирована в таблице"""
+        self.assertEqual(sorted(COMMANDS), ["cat", "cd", "ls", "pwd"])
+
+    def test_run_script(self):
+        """Скрипт выполняется до exit, ошибки разбора сообщаются построчно"""
+        out = io.StringIO()
+        timings = run_script(self.vfs, ["cd home/user\n", "\n", 'ls "x\n', "cat notes.txt\n",
+                                        "nope\n", "exit\n", "pwd\n"], out)
+
+        self.assertEqual(out.getvalue(), "syntax error: no closing quotation\nnotes\n"
+                                         "nope: command not found\n")
+        self.assertEqual([name for name, _ in timings], ["cd", 'ls "x', "cat", "nope"])
+
+    def test_lazy_input(self):
+        """Команда выполняется до чтения следующей строки"""
+        out = io.StringIO()
+        seen = []
+
+        def lines():
+            yield "pwd\n"
+            seen.append(out.getvalue())
+            yield "exit\n"
+
+        run_script(self.vfs, lines(), out)
+        self.assertEqual(seen, ["/\n"])
+
+    def test_output_flushed_once(self):
+        """Вывод сбрасывается один раз в конце, по команде - только по запросу"""
+        class CountingOutput(io.StringIO):
+            flushes = 0
+
+            def flush(self):
+                self.flushes += 1
+
+        for flush, expected in ((False, 1), (True, 4)):
+            out = CountingOutput()
+            run_script(self.vfs, ["pwd\n", "ls\n", "nope\n"], out, flush=flush)
+            self.assertEqual(out.flushes, expected)
+
+if __name__ == '__main__':
+    unittest.main()
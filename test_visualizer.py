@@ -0,0 +1,71 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from visualizer import DependencyVisualizer, visualize_batch
+
+class StubResolver:
+    """Резолвер с одной зависимостью для каждой цели"""
+
+    def resolve(self, crate_name, version):
+        return [{"name": "dep", "version": "1.0", "kind": "normal", "optional": False}]
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "render_cache.json")
+        self.available = DependencyVisualizer._graphviz_available
+        DependencyVisualizer._graphviz_available = True
+        self.visualizer = DependencyVisualizer(cache_file=self.cache_file)
+        self.saves = 0
+
+        def generate_image(dot_source, output_filename, format='png'):
+            open(output_filename, 'w').close()
+            return True
+
+        save = self.visualizer.save_render_cache
+        def counting_save():
+            self.saves += 1
+            save()
+
+        self.visualizer.generate_image = generate_image
+        self.visualizer.save_render_cache = counting_save
+
+    def tearDown(self):
+        DependencyVisualizer._graphviz_available = self.available
+        self.tmp.cleanup()
+
+    def test_parallel_batch(self):
+        """Параллельная отрисовка не портит кэш, он сохраняется один раз"""
+        targets = [f"crate{i}@1.0" for i in range(500)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = visualize_batch(targets, self.tmp.name, workers=16,
+                                      visualizer=self.visualizer, resolver=StubResolver())
+
+        self.assertTrue(all(result['status'] == 'rendered' for result in results))
+        self.assertEqual(self.saves, 1)
+        with open(self.cache_file) as f:
+            self.assertEqual(len(json.load(f)), 500)
+
+    def test_rerender_skips_unchanged(self):
+        """Перерисовка DOT файлов пропускает неизменившиеся и пишет кэш один раз"""
+        dot_source = self.visualizer.generate_dot_graph("serde", "1.0", StubResolver().resolve("serde", "1.0"))
+        for name in ("a", "b", "c"):
+            with open(os.path.join(self.tmp.name, f"{name}_dependencies.dot"), 'w') as f:
+                f.write(dot_source)
+        pattern = os.path.join(self.tmp.name, "*_dependencies.dot")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = self.visualizer.rerender_dot_files(pattern)
+            second = self.visualizer.rerender_dot_files(pattern)
+
+        self.assertEqual(first['rendered'], 3)
+        self.assertEqual(second, {'rendered': 0, 'skipped': 3, 'failed': 0})
+        self.assertEqual(self.saves, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,17 @@
 import unittest
 import tempfile
 import os
+import io
 import json
+import multiprocessing
+from unittest import mock
 from assembler import VMAssembler
-from interpreter import VMInterpreter
+from interpreter import VMInterpreter, PagedMemory, SharedMemorySegment
+from result_cache import ResultCache
+from disassembler import VMDisassembler
+import cli
+import fuzz
+from dumptool import MemoryDump, diff_dumps
 
 class TestVMAssembler(unittest.TestCase):
     
@@ -121,5 +129,489 @@ class TestVMInterpreter(unittest.TestCase):
         
         self.assertEqual(vm.memory[777], 42)
 
+class TestVMControlFlow(unittest.TestCase):
+    
+    # Счетчик в ячейке 0 уменьшается до нуля, ячейка 1 считает итерации
+    LOOP_PROGRAM = {
+        "instructions": [
+            {"op": "LOAD_CONST", "value": 5},
+            {"op": "WRITE_MEM", "address": 0},
+            {"label": "loop", "op": "LOAD_CONST", "value": 0},
+            {"op": "READ_MEM"},
+            {"op": "JUMP_IF_ZERO", "target": "end"},
+            {"op": "LOAD_CONST", "value": 0},
+            {"op": "READ_MEM"},
+            {"op": "LOAD_CONST", "value": 255},
+            {"op": "BINARY_OP", "address": 0},
+            {"op": "WRITE_MEM", "address": 0},
+            {"op": "LOAD_CONST", "value": 1},
+            {"op": "READ_MEM"},
+            {"op": "LOAD_CONST", "value": 1},
+            {"op": "BINARY_OP", "address": 0},
+            {"op": "WRITE_MEM", "address": 1},
+            {"op": "JUMP", "target": "loop"},
+            {"label": "end"}
+        ]
+    }
+    
+    def assemble(self, program, binary=False):
+        with tempfile.TemporaryDirectory() as tmp:
+            source_file = os.path.join(tmp, "source.json")
+            output_file = os.path.join(tmp, "output")
+            with open(source_file, 'w') as f:
+                json.dump(program, f)
+            assembler = VMAssembler()
+            if binary:
+                return assembler.assemble_to_binary(source_file, output_file)[0]
+            return assembler.assemble_to_intermediate(source_file, output_file)
+    
+    def test_labels_resolved_to_indices(self):
+        """Метки заменяются номерами инструкций"""
+        program = self.assemble(self.LOOP_PROGRAM)
+        
+        self.assertEqual(len(program), 16)
+        self.assertEqual(program[4], {"op": "JUMP_IF_ZERO", "target": 16})
+        self.assertEqual(program[15], {"op": "JUMP", "target": 2})
+        
+    def test_loop_execution(self):
+        """Цикл выполняется нужное число раз"""
+        vm = VMInterpreter()
+        vm.set_intermediate_program(self.assemble(self.LOOP_PROGRAM))
+        vm.run_from_intermediate()
+        
+        self.assertEqual(vm.data_memory[0], 0)
+        self.assertEqual(vm.data_memory[1], 5)
+        self.assertEqual(vm.stack, [])
+        
+    def test_binary_jumps(self):
+        """Переходы в бинарном формате используют байтовые смещения"""
+        program = {
+            "instructions": [
+                {"op": "LOAD_CONST", "value": 0},
+                {"op": "JUMP_IF_ZERO", "target": "skip"},
+                {"op": "LOAD_CONST", "value": 128},
+                {"label": "skip", "op": "LOAD_CONST", "value": 256},
+                {"op": "JUMP", "target": "end"},
+                {"op": "LOAD_CONST", "value": 384},
+                {"label": "end"}
+            ]
+        }
+        vm = VMInterpreter()
+        vm.load_program_from_binary(bytes(self.assemble(program, binary=True)))
+        vm.run_from_binary()
+        
+        self.assertEqual(vm.stack, [256])
+        self.assertEqual(vm.jump_table, {5: 13, 18: 26})
+        
+    def test_unknown_label(self):
+        """Переход на неизвестную метку - ошибка ассемблирования"""
+        with self.assertRaises(ValueError):
+            self.assemble({"instructions": [{"op": "JUMP", "target": "nowhere"}]})
+
+class TestVMBlockOperations(unittest.TestCase):
+    
+    def test_memcpy(self):
+        """Копирование блока памяти одной инструкцией"""
+        vm = VMInterpreter()
+        vm.initialize_memory_with_array(100, [1, 2, 3, 4])
+        vm.set_intermediate_program([
+            {"op": "LOAD_CONST", "value": 200},
+            {"op": "LOAD_CONST", "value": 100},
+            {"op": "LOAD_CONST", "value": 4},
+            {"op": "MEMCPY"}
+        ])
+        vm.run_from_intermediate()
+        
+        self.assertEqual(vm.data_memory[200:204], [1, 2, 3, 4])
+        self.assertEqual(vm.stack, [])
+        
+    def test_memset_binary(self):
+        """Заполнение блока памяти из бинарной программы"""
+        vm = VMInterpreter()
+        # LOAD_CONST 128; LOAD_CONST 384; LOAD_CONST 256; MEMSET
+        vm.load_program_from_binary(bytes([
+            0xE0, 0x00, 0x00, 0x00, 0x01,
+            0xE0, 0x00, 0x00, 0x00, 0x03,
+            0xE0, 0x00, 0x00, 0x00, 0x02,
+            0xC0
+        ]))
+        vm.run_from_binary()
+        
+        self.assertEqual(vm.data_memory[128:384], [384 & 0xFF] * 256)
+        self.assertEqual(vm.data_memory[384], 0)
+        
+    def test_block_out_of_range(self):
+        """Блок за границей памяти не изменяет память"""
+        vm = VMInterpreter(data_memory_size=16)
+        vm.set_intermediate_program([
+            {"op": "LOAD_CONST", "value": 10},
+            {"op": "LOAD_CONST", "value": 7},
+            {"op": "LOAD_CONST", "value": 8},
+            {"op": "MEMSET"}
+        ])
+        vm.run_from_intermediate()
+        
+        self.assertEqual(vm.data_memory[:], [0] * 16)
+
+class TestPagedMemory(unittest.TestCase):
+    
+    def test_sparse_pages(self):
+        """Страницы выделяются только при записи ненулевых данных"""
+        memory = PagedMemory()
+        
+        self.assertEqual(len(memory), 1 << 21)
+        self.assertEqual(memory[0x1FFFFF], 0)
+        memory[0:8192] = bytes(8192)
+        self.assertEqual(memory.resident_pages(), 0)
+        
+        memory[0x1FFFFF] = 7
+        memory[4094:4098] = [1, 2, 3, 4]
+        self.assertEqual(memory.resident_pages(), 3)
+        self.assertEqual(memory[4093:4099], [0, 1, 2, 3, 4, 0])
+        self.assertEqual(memory[0x1FFFFF], 7)
+        
+    def test_full_address_space(self):
+        """Запись по старшим адресам 21-битного пространства"""
+        vm = VMInterpreter()
+        vm.set_intermediate_program([
+            {"op": "LOAD_CONST", "value": 42},
+            {"op": "WRITE_MEM", "address": 0x1FFF00},
+            {"op": "LOAD_CONST", "value": 0x1FFF00},
+            {"op": "READ_MEM"}
+        ])
+        vm.run_from_intermediate()
+        
+        self.assertEqual(vm.stack, [42])
+        self.assertEqual(vm.get_state()['resident_pages'], 1)
+
+class TestResultCache(unittest.TestCase):
+    
+    PROGRAM = [
+        {"op": "LOAD_CONST", "value": 100},
+        {"op": "READ_MEM"},
+        {"op": "WRITE_MEM", "address": 5000}
+    ]
+    
+    def run_vm(self, cache, memory_value):
+        vm = VMInterpreter(result_cache=cache)
+        vm.initialize_memory_with_array(100, [memory_value])
+        vm.set_intermediate_program(self.PROGRAM)
+        vm.run_from_intermediate()
+        return vm
+    
+    def test_hit_restores_state(self):
+        """Повторный запуск восстанавливает состояние из кэша"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp)
+            first = self.run_vm(cache, 7)
+            second = self.run_vm(cache, 7)
+            
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(second.data_memory[5000], 7)
+            self.assertEqual(second.get_state(), first.get_state())
+            
+    def test_initial_memory_in_key(self):
+        """Другая начальная память - другой ключ"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp)
+            self.run_vm(cache, 7)
+            vm = self.run_vm(cache, 9)
+            
+            self.assertEqual(cache.hits, 0)
+            self.assertEqual(vm.data_memory[5000], 9)
+            
+    def test_memory_size_in_key(self):
+        """Другой размер памяти данных - другой ключ"""
+        program = [{"op": "LOAD_CONST", "value": 9}, {"op": "WRITE_MEM", "address": 100}]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp)
+            small = VMInterpreter(data_memory_size=16, result_cache=cache, verbose=False)
+            small.set_intermediate_program(program)
+            small.run_from_intermediate()
+            vm = VMInterpreter(result_cache=cache, verbose=False)
+            vm.set_intermediate_program(program)
+            vm.run_from_intermediate()
+            
+            self.assertEqual(cache.hits, 0)
+            self.assertEqual(vm.data_memory[100], 9)
+            
+    def test_lru_eviction(self):
+        """Лишние записи вытесняются"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp, max_entries=2)
+            for value in range(4):
+                self.run_vm(cache, value)
+                
+            self.assertEqual(len(os.listdir(tmp)), 2)
+            
+    def test_concurrent_removal(self):
+        """Записи, удаленные другим процессом, не прерывают get и put"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(tmp, max_entries=1)
+            cache.put("a", {"value": 1})
+            cache.put("b", {"value": 2})
+            
+            with mock.patch("result_cache.os.utime", side_effect=FileNotFoundError):
+                self.assertEqual(cache.get("b"), {"value": 2})
+                
+            listed = list(os.scandir(tmp))
+            os.remove(os.path.join(tmp, "b.json"))
+            cache.put("c", {"value": 3})
+            with mock.patch("result_cache.os.scandir", return_value=iter(listed)):
+                cache.evict()
+            self.assertEqual(cache.get("c"), {"value": 3})
+
+class TestVMDisassembler(unittest.TestCase):
+    
+    def test_round_trip(self):
+        """Бинарная программа переводится обратно в промежуточное представление"""
+        instructions = TestVMControlFlow.LOOP_PROGRAM["instructions"]
+        assembler = VMAssembler()
+        binary = assembler.encode_program(instructions)
+        intermediate = assembler.build_intermediate(instructions)
+        
+        result = VMDisassembler().to_intermediate(binary)
+        
+        # В бинарном формате LOAD_CONST хранит только биты 7..31,
+        # а адреса WRITE_MEM/BINARY_OP - только биты 6..20
+        for instr in intermediate:
+            if instr["op"] == "LOAD_CONST":
+                instr["value"] &= ~0x7F
+            elif "address" in instr:
+                instr["address"] &= ~0x3F
+        self.assertEqual(result["program"], intermediate)
+        self.assertNotIn("truncated", result["metadata"])
+        
+    def test_truncated_instruction(self):
+        """Неполная последняя инструкция отмечается явно"""
+        data = bytes([0x00, 0xE0, 0x00])
+        disassembler = VMDisassembler()
+        
+        result = disassembler.to_intermediate(data)
+        self.assertEqual(result["program"], [{"op": "READ_MEM"}])
+        self.assertEqual(result["metadata"]["truncated"], {"offset": 1, "bytes": [0xE0, 0x00]})
+        with self.assertRaises(ValueError):
+            disassembler.to_intermediate(data, strict=True)
+
+    def test_jump_end_matches_interpreter(self):
+        """Конец программы для переходов тот же, что у интерпретатора"""
+        disassembler = VMDisassembler()
+        to_end = bytes([0x20, 0x00, 0x05, 0xE0, 0x00])
+        to_truncated = bytes([0x20, 0x00, 0x03, 0xE0, 0x00])
+        
+        self.assertEqual(disassembler.to_intermediate(to_end)["program"], [{"op": "JUMP", "target": 1}])
+        VMInterpreter(verbose=False).load_program_from_binary(to_end)
+        for engine in (disassembler.to_intermediate, VMInterpreter(verbose=False).load_program_from_binary):
+            with self.assertRaises(ValueError):
+                engine(to_truncated)
+
+class TestSuperinstructions(unittest.TestCase):
+    
+    PROGRAM = [
+        {"op": "LOAD_CONST", "value": 7},
+        {"op": "WRITE_MEM", "address": 100},
+        {"op": "LOAD_CONST", "value": 100},
+        {"op": "READ_MEM"},
+        {"op": "WRITE_MEM", "address": 200},
+        {"op": "LOAD_CONST", "value": 200},
+        {"op": "READ_MEM"}
+    ]
+    
+    def run_vm(self, program, fuse, max_steps=1000):
+        vm = VMInterpreter(fuse_superinstructions=fuse)
+        vm.set_intermediate_program(program)
+        vm.run_from_intermediate(max_steps)
+        return vm
+    
+    def test_fused_matches_plain(self):
+        """Слитая программа дает то же состояние и считает исходные инструкции"""
+        fused = self.run_vm(self.PROGRAM, True)
+        plain = self.run_vm(self.PROGRAM, False)
+        
+        self.assertEqual(fused.get_state(), plain.get_state())
+        self.assertEqual(fused.fusion_statistics(), {
+            "sites": {"STORE_CONST": 1, "MOVE_CELL": 1, "READ_ABS": 1},
+            "hits": {"STORE_CONST": 1, "MOVE_CELL": 1, "READ_ABS": 1}
+        })
+        
+    def test_step_limit_inside_fusion(self):
+        """Ограничение шагов посреди слитой последовательности"""
+        fused = self.run_vm(self.PROGRAM, True, max_steps=4)
+        plain = self.run_vm(self.PROGRAM, False, max_steps=4)
+        
+        self.assertEqual(fused.get_state(), plain.get_state())
+        self.assertEqual(fused.pc, 4)
+        
+    def test_jump_target_blocks_fusion(self):
+        """Последовательность с целью перехода внутри не сливается"""
+        program = [
+            {"op": "LOAD_CONST", "value": 0},
+            {"op": "JUMP_IF_ZERO", "target": 3},
+            {"op": "LOAD_CONST", "value": 5},
+            {"op": "WRITE_MEM", "address": 10}
+        ]
+        vm = self.run_vm(program, True)
+        
+        self.assertEqual(vm.fusion_statistics()["sites"], {})
+        self.assertEqual(vm.get_state(), self.run_vm(program, False).get_state())
+
+class TestDifferentialFuzzer(unittest.TestCase):
+    
+    def test_truncated_constant_detected(self):
+        """Потеря младших битов константы в бинарном формате обнаруживается"""
+        case = {"program": [{"op": "LOAD_CONST", "value": 5}], "memory": {}}
+        mismatch = fuzz.check_case(case, 100, ["intermediate", "binary"])
+        
+        self.assertEqual(mismatch["fields"], ["stack"])
+        
+    def test_aligned_programs_agree(self):
+        """Точно представимые программы дают одинаковый результат"""
+        result = fuzz.fuzz_batch((1, 50, 16, 100, True, ["intermediate", "binary"]))
+        
+        self.assertEqual(result["cases"], 50)
+        self.assertEqual(result["mismatches"], [])
+
+class TestWorkerMode(unittest.TestCase):
+    
+    def test_jobs_stream(self):
+        """Обработчик отвечает на каждое задание одной строкой JSON"""
+        with tempfile.TemporaryDirectory() as tmp:
+            program_file = os.path.join(tmp, "program.json")
+            with open(program_file, 'w') as f:
+                json.dump({"program": [
+                    {"op": "LOAD_CONST", "value": 3},
+                    {"op": "WRITE_MEM", "address": 10}
+                ]}, f)
+            jobs = io.StringIO("\n".join([
+                json.dumps({"id": 1, "cmd": "dump", "program": program_file,
+                            "start_addr": 10, "end_addr": 11}),
+                json.dumps({"id": 2, "cmd": "unknown"})
+            ]))
+            output = io.StringIO()
+            cli.run_worker(jobs, output)
+            
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(responses[0]["result"]["memory_dump"], {"10": 3})
+        self.assertFalse(responses[1]["ok"])
+
+class TestCliParser(unittest.TestCase):
+    
+    def test_only_selected_subparser(self):
+        """Для известной команды строится только ее подпарсер"""
+        subparsers = cli.build_parser('run')._subparsers._group_actions[0]
+        self.assertEqual(list(subparsers.choices), ['run'])
+        args = cli.build_parser('run').parse_args(['run', 'p.json', '--dump', 'd.json'])
+        self.assertEqual((args.program, args.dump), ('p.json', 'd.json'))
+        
+        subparsers = cli.build_parser('--help')._subparsers._group_actions[0]
+        self.assertEqual(tuple(subparsers.choices), cli.COMMAND_NAMES)
+
+class TestMemoryDumpTool(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vm = VMInterpreter(verbose=False)
+        self.vm.initialize_memory_with_array(0, [i % 256 for i in range(3000)])
+        self.first = os.path.join(self.tmp.name, "first.json")
+        self.vm.save_memory_dump(self.first, 0, 3000)
+        
+    def tearDown(self):
+        self.tmp.cleanup()
+        
+    def test_range_read(self):
+        """Чтение диапазона по индексу совпадает с полной загрузкой JSON"""
+        with open(self.first) as f:
+            full = json.load(f)
+        with MemoryDump(self.first, stride=64) as dump:
+            self.assertEqual(dump.count, 3000)
+            self.assertEqual(dump.read_range(1000, 1004), {1000: 232, 1001: 233, 1002: 234, 1003: 235})
+            self.assertEqual(dump[2999], 2999 % 256)
+            self.assertIsNone(dump[3000])
+            self.assertEqual(dump.header()["stack"], full["stack"])
+        self.assertTrue(os.path.exists(self.first + MemoryDump.INDEX_SUFFIX))
+        
+        with MemoryDump(self.first, stride=64) as dump:
+            self.assertEqual(dump.read_range(0, 3000), {int(k): v for k, v in full["memory_dump"].items()})
+            
+    def test_unwritable_index(self):
+        """Если индекс нельзя сохранить, дамп читается с индексом в памяти"""
+        os.mkdir(self.first + MemoryDump.INDEX_SUFFIX)
+        with MemoryDump(self.first, stride=64) as dump:
+            self.assertEqual(dump[1000], 1000 % 256)
+            
+    def test_malformed_dump_closed(self):
+        """Некорректный файл вызывает ValueError и закрывается"""
+        closed = []
+        
+        class TrackedDump(MemoryDump):
+            def close(self):
+                closed.append(self.path)
+                super().close()
+                
+        path = os.path.join(self.tmp.name, "broken.json")
+        with open(path, 'w') as f:
+            f.write('{"memory_dump": {"1": oops}}')
+        with self.assertRaises(ValueError):
+            TrackedDump(path)
+        self.assertEqual(closed, [path])
+        
+    def test_streaming_diff(self):
+        """Различаются измененные ячейки и ячейки вне общего диапазона"""
+        self.vm.data_memory[1500] = 7
+        second = os.path.join(self.tmp.name, "second.json")
+        self.vm.save_memory_dump(second, 10, 3001)
+        
+        with MemoryDump(self.first) as first, MemoryDump(second) as other:
+            differences = list(diff_dumps(first, other, 5))
+        self.assertEqual(differences, [(addr, addr, None) for addr in range(5, 10)] +
+                         [(1500, 1500 % 256, 7), (3000, None, 0)])
+
+def run_on_shared_memory(args):
+    """Рабочий процесс: копирует ячейку общего сегмента и пишет свою метку"""
+    descriptor, k = args
+    vm = VMInterpreter(verbose=False)
+    segment = vm.attach_shared_memory(descriptor)
+    vm.set_intermediate_program([
+        {"op": "LOAD_CONST", "value": 5000 + k},
+        {"op": "READ_MEM"},
+        {"op": "WRITE_MEM", "address": 9000 + k},
+        {"op": "LOAD_CONST", "value": 100 + k},
+        {"op": "WRITE_MEM", "address": 5000}
+    ])
+    vm.run_from_intermediate()
+    result = (vm.data_memory[9000 + k], vm.data_memory[5000])
+    segment.close()
+    return result
+
+class TestSharedMemory(unittest.TestCase):
+    
+    def setUp(self):
+        self.segment = SharedMemorySegment.create(5000, list(range(10, 20)))
+        
+    def tearDown(self):
+        self.segment.close()
+        
+    def test_copy_on_write(self):
+        """Запись попадает в частную страницу, общий сегмент не меняется"""
+        vm = VMInterpreter(verbose=False)
+        vm.attach_shared_memory(self.segment.descriptor)
+        self.assertEqual(vm.data_memory[5000:5003], [10, 11, 12])
+        self.assertEqual(vm.data_memory.resident_pages(), 0)
+        
+        vm.data_memory[5001] = 99
+        self.assertEqual(vm.data_memory[5000:5003], [10, 99, 12])
+        self.assertEqual(vm.data_memory.resident_pages(), 1)
+        self.assertEqual(self.segment.page(1)[5001 - 4096], 11)
+        vm.data_memory.base.close()
+        
+    def test_parallel_workers(self):
+        """Рабочие процессы читают общий сегмент и не видят записей друг друга"""
+        tasks = [(self.segment.descriptor, k) for k in range(4)]
+        with multiprocessing.Pool(2) as pool:
+            results = pool.map(run_on_shared_memory, tasks)
+            
+        self.assertEqual(results, [(10 + k, 100 + k) for k in range(4)])
+        self.assertEqual(bytes(self.segment.page(1)[5000 - 4096:5000 - 4086]), bytes(range(10, 20)))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,28 +1,107 @@
 import subprocess
 import os
 import sys
+import glob
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RENDER_CACHE_FILE = '.render_cache.json'
+
+# Примеры зависимостей для демонстрации и пакетной визуализации
+EXAMPLE_DEPENDENCIES = {
+    "serde": {
+        "dependencies": [
+            {"name": "serde_derive", "version": "1.0", "kind": "normal", "optional": False},
+            {"name": "proc-macro2", "version": "1.0", "kind": "dev", "optional": False}
+        ]
+    },
+    "tokio": {
+        "dependencies": [
+            {"name": "tokio-macros", "version": "1.0", "kind": "normal", "optional": False},
+            {"name": "libc", "version": "0.2", "kind": "normal", "optional": True},
+            {"name": "futures", "version": "0.3", "kind": "normal", "optional": False}
+        ]
+    },
+    "reqwest": {
+        "dependencies": [
+            {"name": "hyper", "version": "0.14", "kind": "normal", "optional": False},
+            {"name": "tokio", "version": "1.0", "kind": "normal", "optional": False},
+            {"name": "serde_json", "version": "1.0", "kind": "normal", "optional": True},
+            {"name": "log", "version": "0.4", "kind": "dev", "optional": False}
+        ]
+    }
+}
+
+
+class DependencyResolver:
+    """
+    Кэширующий источник зависимостей пакетов, общий для всех целей пакетной визуализации
+    """
+
+    def __init__(self, source=None):
+        self.source = EXAMPLE_DEPENDENCIES if source is None else source
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, crate_name, version):
+        """
+        Возвращает список зависимостей пакета crate_name версии version
+        """
+        key = (crate_name, version)
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+
+        if crate_name not in self.source:
+            raise ValueError(f"Нет данных о зависимостях пакета {crate_name}")
+        dependencies = self.source[crate_name]["dependencies"]
+
+        with self.lock:
+            self.cache[key] = dependencies
+        return dependencies
+
 
 class DependencyVisualizer:
     """
     Класс для визуализации графа зависимостей с помощью Graphviz
     """
     
-    def __init__(self):
+    # Результат проверки Graphviz, общий для всех экземпляров
+    _graphviz_available = None
+    
+    def __init__(self, cache_file=RENDER_CACHE_FILE):
         self.check_graphviz_installation()
+        self.cache_file = cache_file
+        self.render_cache = self._load_render_cache()
+        self.render_cache_lock = threading.Lock()
     
     def check_graphviz_installation(self):
         """
-        Проверяет установлен ли Graphviz
+        Проверяет установлен ли Graphviz (подпроцесс запускается один раз за сеанс)
         """
+        if DependencyVisualizer._graphviz_available is not None:
+            return DependencyVisualizer._graphviz_available
+
         try:
             subprocess.run(['dot', '-V'], capture_output=True, check=True)
             print("✅ Graphviz установлен и доступен")
-            return True
+            DependencyVisualizer._graphviz_available = True
         except (subprocess.CalledProcessError, FileNotFoundError):
             print("❌ Graphviz не установлен или не найден в PATH")
             print("Установите Graphviz: https://graphviz.org/download/")
-            return False
+            DependencyVisualizer._graphviz_available = False
+        return DependencyVisualizer._graphviz_available
     
+    @staticmethod
+    def hash_text(text):
+        """
+        Вычисляет хэш DOT документа или фрагмента
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
     def generate_dot_graph(self, crate_name, version, dependencies):
         """
         Генерирует DOT представление графа зависимостей
@@ -72,21 +151,13 @@ class DependencyVisualizer:
         Генерирует изображение из DOT источника
         """
         try:
-            # Сохраняем DOT во временный файл
-            temp_dot = 'temp_graph.dot'
-            with open(temp_dot, 'w', encoding='utf-8') as f:
-                f.write(dot_source)
-            
-            # Запускаем Graphviz
+            # Передаем DOT через stdin, чтобы параллельные вызовы
+            # не делили общий временный файл
             result = subprocess.run([
                 'dot', 
                 f'-T{format}', 
-                temp_dot, 
                 '-o', output_filename
-            ], capture_output=True, check=True)
-            
-            # Удаляем временный файл
-            os.remove(temp_dot)
+            ], input=dot_source.encode('utf-8'), capture_output=True, check=True)
             
             return True
             
@@ -98,6 +169,65 @@ class DependencyVisualizer:
             print(f"Ошибка при создании изображения: {e}")
             return False
     
+    def _load_render_cache(self):
+        if self.cache_file and os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def save_render_cache(self):
+        """
+        Сохраняет хэши отрисованных графов на диск
+        """
+        if not self.cache_file:
+            return
+        with self.render_cache_lock:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.render_cache, f, indent=2, ensure_ascii=False)
+
+    def render_if_changed(self, dot_source, output_filename, format='png', save=True):
+        """
+        Генерирует изображение, только если DOT документ изменился
+        с момента последней отрисовки в output_filename.
+        При save=False кэш не записывается на диск - вызывающий код
+        сохраняет его сам один раз после пакета отрисовок.
+        Возвращает 'skipped', 'rendered' или 'failed'
+        """
+        dot_hash = self.hash_text(f'{format}\n{dot_source}')
+        with self.render_cache_lock:
+            cached_hash = self.render_cache.get(output_filename)
+        if cached_hash == dot_hash and os.path.exists(output_filename):
+            return 'skipped'
+
+        if not self.generate_image(dot_source, output_filename, format):
+            return 'failed'
+
+        # Изменение словаря под той же блокировкой, что и его запись на диск
+        with self.render_cache_lock:
+            self.render_cache[output_filename] = dot_hash
+        if save:
+            self.save_render_cache()
+        return 'rendered'
+
+    def rerender_dot_files(self, pattern='*_dependencies.dot', format='png'):
+        """
+        Перерисовывает все DOT файлы по шаблону, пропуская неизменившиеся
+        """
+        stats = {'rendered': 0, 'skipped': 0, 'failed': 0}
+        for dot_file in sorted(glob.glob(pattern)):
+            with open(dot_file, 'r', encoding='utf-8') as f:
+                dot_source = f.read()
+            output_filename = f'{os.path.splitext(dot_file)[0]}.{format}'
+            status = self.render_if_changed(dot_source, output_filename, format, save=False)
+            stats[status] += 1
+            print(f"{dot_file}: {status}")
+        if stats['rendered']:
+            self.save_render_cache()
+        return stats
+
     def compare_with_cargo(self, crate_name, version):
         """
         Сравнивает результаты с выводом cargo tree
@@ -118,36 +248,11 @@ def demonstrate_visualizations():
     """
     visualizer = DependencyVisualizer()
     
-    # Примеры DOT графов для демонстрации
-    examples = {
-        "serde": {
-            "dependencies": [
-                {"name": "serde_derive", "version": "1.0", "kind": "normal", "optional": False},
-                {"name": "proc-macro2", "version": "1.0", "kind": "dev", "optional": False}
-            ]
-        },
-        "tokio": {
-            "dependencies": [
-                {"name": "tokio-macros", "version": "1.0", "kind": "normal", "optional": False},
-                {"name": "libc", "version": "0.2", "kind": "normal", "optional": True},
-                {"name": "futures", "version": "0.3", "kind": "normal", "optional": False}
-            ]
-        },
-        "reqwest": {
-            "dependencies": [
-                {"name": "hyper", "version": "0.14", "kind": "normal", "optional": False},
-                {"name": "tokio", "version": "1.0", "kind": "normal", "optional": False},
-                {"name": "serde_json", "version": "1.0", "kind": "normal", "optional": True},
-                {"name": "log", "version": "0.4", "kind": "dev", "optional": False}
-            ]
-        }
-    }
-    
     print("=" * 60)
     print("ДЕМОНСТРАЦИЯ ВИЗУАЛИЗАЦИЙ ДЛЯ ТРЕХ ПАКЕТОВ")
     print("=" * 60)
     
-    for crate_name, data in examples.items():
+    for crate_name, data in EXAMPLE_DEPENDENCIES.items():
         print(f"\n📊 Визуализация для пакета: {crate_name}")
         
         dot_source = visualizer.generate_dot_graph(
@@ -164,15 +269,87 @@ def demonstrate_visualizations():
         
         # Генерируем изображение
         image_filename = f"examples/{crate_name}_graph.png"
-        success = visualizer.generate_image(dot_source, image_filename)
+        status = visualizer.render_if_changed(dot_source, image_filename)
         
-        if success:
+        if status == 'rendered':
             print(f"✅ Изображение сохранено: {image_filename}")
+        elif status == 'skipped':
+            print(f"⏭️ Граф не изменился, изображение актуально: {image_filename}")
         else:
             print("❌ Ошибка при создании изображения")
         
         # Сравнение с cargo
         visualizer.compare_with_cargo(crate_name, "1.0.0")
 
+def parse_target(target):
+    """
+    Разбирает цель вида crate@version
+    """
+    crate_name, _, version = target.partition('@')
+    if not crate_name or not version:
+        raise ValueError(f"Ожидалась цель вида crate@version, получено: {target}")
+    return crate_name, version
+
+def visualize_batch(targets, output_dir='examples', format='png', workers=None,
+                    visualizer=None, resolver=None):
+    """
+    Пакетная визуализация списка целей crate@version.
+
+    Все цели используют один кэш зависимостей и одну проверку Graphviz,
+    разрешение и отрисовка выполняются параллельно. Возвращает список
+    результатов с временем каждого этапа по каждой цели
+    """
+    visualizer = visualizer or DependencyVisualizer()
+    resolver = resolver or DependencyResolver()
+    os.makedirs(output_dir, exist_ok=True)
+
+    def process(target):
+        result = {'target': target, 'status': 'failed', 'timings': {}}
+        started = time.perf_counter()
+        try:
+            crate_name, version = parse_target(target)
+            dependencies = resolver.resolve(crate_name, version)
+            resolved = time.perf_counter()
+            result['timings']['resolve'] = resolved - started
+
+            dot_source = visualizer.generate_dot_graph(
+                crate_name, version, dependencies
+            )
+            generated = time.perf_counter()
+            result['timings']['generate'] = generated - resolved
+
+            output_filename = os.path.join(output_dir, f"{crate_name}_{version}_graph.{format}")
+            result['output'] = output_filename
+            if DependencyVisualizer._graphviz_available:
+                result['status'] = visualizer.render_if_changed(
+                    dot_source, output_filename, format, save=False
+                )
+            else:
+                result['error'] = "Graphviz недоступен"
+            result['timings']['render'] = time.perf_counter() - generated
+        except ValueError as e:
+            result['error'] = str(e)
+        result['timings']['total'] = time.perf_counter() - started
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = list(executor.map(process, targets))
+
+    # Кэш отрисовки записывается один раз после завершения всех потоков
+    if any(result['status'] == 'rendered' for result in results):
+        visualizer.save_render_cache()
+
+    for result in results:
+        timings = ", ".join(f"{stage}={seconds * 1000:.1f} мс"
+                            for stage, seconds in result['timings'].items())
+        print(f"{result['target']}: {result['status']} ({timings})")
+        if 'error' in result:
+            print(f"  Ошибка: {result['error']}")
+
+    return results
+
 if __name__ == "__main__":
-    demonstrate_visualizations()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        visualize_batch(sys.argv[1:])
+    else:
+        demonstrate_visualizations()
\ No newline at end of file